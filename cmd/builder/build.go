@@ -124,9 +124,12 @@ func readPassage(cache map[string][]rune, filename string, start, end int) strin
 	}
 	snippet := strings.TrimSpace(string(runes[start:end]))
 	snippet = multiBlankRe.ReplaceAllString(snippet, "\n\n")
-	sr := []rune(snippet)
-	if len(sr) > maxPassageChars {
-		snippet = string(sr[:maxPassageChars])
+	// A string's byte length bounds its rune count, so only passages longer than
+	// maxPassageChars bytes need the rune conversion to truncate.
+	if len(snippet) > maxPassageChars {
+		if sr := []rune(snippet); len(sr) > maxPassageChars {
+			snippet = string(sr[:maxPassageChars])
+		}
 	}
 	return snippet
 }
@@ -141,152 +144,129 @@ func verseLabel(start, end sql.NullInt64) *string {
 	if !end.Valid || end.Int64 == start.Int64 {
 		s = strconv.FormatInt(start.Int64, 10)
 	} else {
-		s = fmt.Sprintf("%d-%d", start.Int64, end.Int64)
+		s = strconv.FormatInt(start.Int64, 10) + "-" + strconv.FormatInt(end.Int64, 10)
 	}
 	return &s
 }
 
 // ── Book building ──────────────────────────────────────────────────────────────
 
-func queryDistinctBooks(db *sql.DB, onlyBook string) []string {
-	var rows *sql.Rows
-	var err error
-	if onlyBook != "" {
-		rows, err = db.Query(
-			"SELECT DISTINCT book_slug FROM verse_refs WHERE book_slug = ? ORDER BY book_slug",
-			onlyBook,
-		)
-	} else {
-		rows, err = db.Query(
-			"SELECT DISTINCT book_slug FROM verse_refs ORDER BY book_slug",
-		)
+// writeBook writes one book JSON.zst file containing all chapters. Returns total refs written.
+func writeBook(bookSlug string, chapters []bookChapter) int {
+	book, ok := bySlug[bookSlug]
+	if !ok || len(chapters) == 0 {
+		return 0
 	}
-	if err != nil {
-		log.Fatalf("querying distinct books: %v", err)
+
+	totalRefs := 0
+	for _, ch := range chapters {
+		totalRefs += len(ch.Refs)
 	}
-	defer rows.Close()
 
-	var result []string
-	for rows.Next() {
-		var slug string
-		if err := rows.Scan(&slug); err != nil {
-			log.Fatalf("scanning book row: %v", err)
-		}
-		result = append(result, slug)
+	payload := bookPayload{
+		Book:     book.Name,
+		Chapters: chapters,
 	}
-	return result
-}
 
-// buildBook writes one book JSON.zst file containing all chapters. Returns total refs written.
-func buildBook(db *sql.DB, cache map[string][]rune, bookSlug string, gp *GlobalPassages) int {
-	book, ok := bySlug[bookSlug]
-	if !ok {
+	outPath := filepath.Join(staticDir, "bible", fmt.Sprintf("%s.json.zst", bookSlug))
+	if err := writeZstJSON(outPath, payload); err != nil {
+		log.Printf("writing %s: %v", outPath, err)
 		return 0
 	}
+	return totalRefs
+}
 
+// buildAll reads every ref in a single query ordered by book and chapter, then
+// writes each completed book's file in its own goroutine, bounded by a semaphore
+// of size runtime.NumCPU().
+func buildAll(db *sql.DB, cache map[string][]rune, onlyBook string, gp *GlobalPassages) {
+	where := ""
+	var args []any
+	if onlyBook != "" {
+		where = "WHERE vr.book_slug = ?"
+		args = append(args, onlyBook)
+	}
 	rows, err := db.Query(`
 		SELECT
-			vr.chapter,
+			vr.book_slug, vr.chapter,
 			vr.verse_start, vr.verse_end,
 			vr.passage_start_offset, vr.passage_end_offset,
 			m.id AS manuscript_id,
 			m.filename
 		FROM verse_refs vr
 		JOIN manuscripts m ON m.id = vr.manuscript_id
-		WHERE vr.book_slug = ?
-		ORDER BY vr.chapter, vr.verse_start NULLS LAST, m.author, m.title
-	`, bookSlug)
+		`+where+`
+		ORDER BY vr.book_slug, vr.chapter, vr.verse_start NULLS LAST, m.author, m.title
+	`, args...)
 	if err != nil {
-		log.Printf("querying book %s: %v", bookSlug, err)
-		return 0
+		log.Fatalf("querying book refs: %v", err)
 	}
-	defer rows.Close()
 
-	// Collect refs per chapter, looking up passages from the global registry.
-	chapterMap := make(map[int][]bookRef)
-	var chapterOrder []int
-	seenCh := make(map[int]bool)
+	sem := make(chan struct{}, runtime.NumCPU())
+	var wg sync.WaitGroup
+	var mu sync.Mutex
+	totalRefs, totalFiles := 0, 0
+
+	// flush hands one book's finished chapter list to a writer goroutine.
+	flush := func(slug string, chapters []bookChapter) {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			sem <- struct{}{}
+			defer func() { <-sem }()
+
+			n := writeBook(slug, chapters)
+
+			mu.Lock()
+			if n > 0 {
+				totalRefs += n
+				totalFiles++
+				fmt.Printf("  bible/%s.json.zst  (%d refs)\n", slug, n)
+			}
+			mu.Unlock()
+		}()
+	}
 
+	var curSlug string
+	var chapters []bookChapter
 	for rows.Next() {
+		var slug string
 		var chapter int
 		var verseStart, verseEnd sql.NullInt64
 		var passStart, passEnd int64
 		var mID int64
 		var filename string
 
-		if err := rows.Scan(&chapter, &verseStart, &verseEnd, &passStart, &passEnd,
+		if err := rows.Scan(&slug, &chapter, &verseStart, &verseEnd, &passStart, &passEnd,
 			&mID, &filename); err != nil {
-			log.Printf("scanning ref row for %s: %v", bookSlug, err)
+			log.Printf("scanning ref row: %v", err)
 			continue
 		}
 
-		if !seenCh[chapter] {
-			seenCh[chapter] = true
-			chapterOrder = append(chapterOrder, chapter)
+		if slug != curSlug {
+			if len(chapters) > 0 {
+				flush(curSlug, chapters)
+			}
+			curSlug, chapters = slug, nil
+		}
+		if len(chapters) == 0 || chapters[len(chapters)-1].Ch != chapter {
+			chapters = append(chapters, bookChapter{Ch: chapter})
 		}
 
 		key := gp.intern(cache, filename, int(passStart), int(passEnd))
 
-		chapterMap[chapter] = append(chapterMap[chapter], bookRef{
+		last := &chapters[len(chapters)-1]
+		last.Refs = append(last.Refs, bookRef{
 			V: verseLabel(verseStart, verseEnd),
 			W: mID,
 			P: key,
 		})
 	}
-
-	if len(chapterOrder) == 0 {
-		return 0
-	}
-
-	var chapters []bookChapter
-	totalRefs := 0
-	for _, ch := range chapterOrder {
-		refs := chapterMap[ch]
-		chapters = append(chapters, bookChapter{Ch: ch, Refs: refs})
-		totalRefs += len(refs)
-	}
-
-	payload := bookPayload{
-		Book:     book.Name,
-		Chapters: chapters,
-	}
-
-	outPath := filepath.Join(staticDir, "bible", fmt.Sprintf("%s.json.zst", bookSlug))
-	if err := writeZstJSON(outPath, payload); err != nil {
-		log.Printf("writing %s: %v", outPath, err)
-		return 0
+	rows.Close()
+	if len(chapters) > 0 {
+		flush(curSlug, chapters)
 	}
-	return totalRefs
-}
-
-// buildAll builds all book JSON.zst files in parallel using one goroutine per book,
-// bounded by a semaphore of size runtime.NumCPU().
-func buildAll(db *sql.DB, cache map[string][]rune, onlyBook string, gp *GlobalPassages) {
-	slugs := queryDistinctBooks(db, onlyBook)
-
-	sem := make(chan struct{}, runtime.NumCPU())
-	var wg sync.WaitGroup
-	var mu sync.Mutex
-	totalRefs, totalFiles := 0, 0
-
-	for _, slug := range slugs {
-		wg.Add(1)
-		go func(s string) {
-			defer wg.Done()
-			sem <- struct{}{}
-			defer func() { <-sem }()
-
-			n := buildBook(db, cache, s, gp)
 
-			mu.Lock()
-			if n > 0 {
-				totalRefs += n
-				totalFiles++
-				fmt.Printf("  bible/%s.json.zst  (%d refs)\n", s, n)
-			}
-			mu.Unlock()
-		}(slug)
-	}
 	wg.Wait()
 	fmt.Printf("\nBuilt %d book files, %d total references.\n", totalFiles, totalRefs)
 }
@@ -294,6 +274,8 @@ func buildAll(db *sql.DB, cache map[string][]rune, onlyBook string, gp *GlobalPa
 // ── Works building ────────────────────────────────────────────────────────────
 
 // buildWorks writes one JSON.zst file per manuscript under data/static/manuscripts/.
+// All refs are read in a single query ordered by manuscript; each completed group
+// is encoded and compressed in its own goroutine, bounded by runtime.NumCPU().
 func buildWorks(db *sql.DB, cache map[string][]rune, gp *GlobalPassages) {
 	worksDir := filepath.Join(staticDir, "manuscripts")
 	if err := os.MkdirAll(worksDir, 0755); err != nil {
@@ -315,13 +297,13 @@ func buildWorks(db *sql.DB, cache map[string][]rune, gp *GlobalPassages) {
 		filename string
 		ccelURL  sql.NullString
 	}
-	var manuscripts []mRow
+	manuscripts := make(map[int64]mRow)
 	for mRows.Next() {
 		var m mRow
 		if err := mRows.Scan(&m.id, &m.author, &m.title, &m.year, &m.filename, &m.ccelURL); err != nil {
 			log.Fatalf("scanning manuscript row: %v", err)
 		}
-		manuscripts = append(manuscripts, m)
+		manuscripts[m.id] = m
 	}
 	mRows.Close()
 
@@ -341,67 +323,99 @@ func buildWorks(db *sql.DB, cache map[string][]rune, gp *GlobalPassages) {
 		Refs    []workRef `json:"refs"`
 	}
 
+	sem := make(chan struct{}, runtime.NumCPU())
+	var wg sync.WaitGroup
+	var mu sync.Mutex
 	totalFiles := 0
-	for _, m := range manuscripts {
-		refRows, err := db.Query(`
-			SELECT vr.book, vr.book_slug, vr.chapter,
-			       vr.verse_start, vr.verse_end,
-			       vr.passage_start_offset, vr.passage_end_offset
-			FROM verse_refs vr
-			WHERE vr.manuscript_id = ?
-			ORDER BY vr.book_slug, vr.chapter, vr.verse_start NULLS LAST
-		`, m.id)
-		if err != nil {
-			log.Printf("querying refs for manuscript %d: %v", m.id, err)
-			continue
+
+	// flush hands one manuscript's finished ref list to a writer goroutine.
+	flush := func(m mRow, refs []workRef) {
+		if len(refs) == 0 {
+			return
 		}
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			sem <- struct{}{}
+			defer func() { <-sem }()
 
-		var refs []workRef
-		for refRows.Next() {
-			var book, bookSlug string
-			var chapter int
-			var verseStart, verseEnd sql.NullInt64
-			var passStart, passEnd int
+			payload := workPayload{
+				ID:      m.id,
+				Author:  nullStringOr(m.author, "Unknown"),
+				Title:   nullStringOr(m.title, m.filename),
+				Year:    nullInt64Ptr(m.year),
+				CcelURL: nullStringPtr(m.ccelURL),
+				Refs:    refs,
+			}
 
-			if err := refRows.Scan(&book, &bookSlug, &chapter,
-				&verseStart, &verseEnd, &passStart, &passEnd); err != nil {
-				log.Printf("scanning ref for manuscript %d: %v", m.id, err)
-				continue
+			outPath := filepath.Join(worksDir, fmt.Sprintf("%d.json.zst", m.id))
+			if err := writeZstJSON(outPath, payload); err != nil {
+				log.Printf("writing %s: %v", outPath, err)
+				return
 			}
 
-			key := gp.intern(cache, m.filename, passStart, passEnd)
+			mu.Lock()
+			totalFiles++
+			fmt.Printf("  manuscripts/%d.json.zst  (%d refs)\n", m.id, len(refs))
+			mu.Unlock()
+		}()
+	}
 
-			refs = append(refs, workRef{
-				Book:     book,
-				BookSlug: bookSlug,
-				Chapter:  chapter,
-				V:        verseLabel(verseStart, verseEnd),
-				P:        key,
-			})
-		}
-		refRows.Close()
+	refRows, err := db.Query(`
+		SELECT vr.manuscript_id, vr.book, vr.book_slug, vr.chapter,
+		       vr.verse_start, vr.verse_end,
+		       vr.passage_start_offset, vr.passage_end_offset
+		FROM verse_refs vr
+		ORDER BY vr.manuscript_id, vr.book_slug, vr.chapter, vr.verse_start NULLS LAST
+	`)
+	if err != nil {
+		log.Fatalf("querying work refs: %v", err)
+	}
 
-		if len(refs) == 0 {
+	var cur mRow
+	var refs []workRef
+	haveCur := false
+	for refRows.Next() {
+		var mID int64
+		var book, bookSlug string
+		var chapter int
+		var verseStart, verseEnd sql.NullInt64
+		var passStart, passEnd int
+
+		if err := refRows.Scan(&mID, &book, &bookSlug, &chapter,
+			&verseStart, &verseEnd, &passStart, &passEnd); err != nil {
+			log.Printf("scanning work ref: %v", err)
 			continue
 		}
 
-		payload := workPayload{
-			ID:      m.id,
-			Author:  nullStringOr(m.author, "Unknown"),
-			Title:   nullStringOr(m.title, m.filename),
-			Year:    nullInt64Ptr(m.year),
-			CcelURL: nullStringPtr(m.ccelURL),
-			Refs:    refs,
+		if !haveCur || mID != cur.id {
+			if haveCur {
+				flush(cur, refs)
+			}
+			m, ok := manuscripts[mID]
+			if !ok {
+				haveCur = false
+				continue
+			}
+			cur, refs, haveCur = m, nil, true
 		}
 
-		outPath := filepath.Join(worksDir, fmt.Sprintf("%d.json.zst", m.id))
-		if err := writeZstJSON(outPath, payload); err != nil {
-			log.Printf("writing %s: %v", outPath, err)
-			continue
-		}
-		totalFiles++
-		fmt.Printf("  manuscripts/%d.json.zst  (%d refs)\n", m.id, len(refs))
+		key := gp.intern(cache, cur.filename, passStart, passEnd)
+
+		refs = append(refs, workRef{
+			Book:     book,
+			BookSlug: bookSlug,
+			Chapter:  chapter,
+			V:        verseLabel(verseStart, verseEnd),
+			P:        key,
+		})
 	}
+	refRows.Close()
+	if haveCur {
+		flush(cur, refs)
+	}
+
+	wg.Wait()
 	fmt.Printf("\nBuilt %d work files.\n", totalFiles)
 }
 
@@ -421,24 +435,27 @@ func buildIndex(db *sql.DB, onlyBook string) {
 		log.Fatalf("querying chapter counts: %v", err)
 	}
 	type chapterData struct {
+		ch    int
 		total int
 		byCat map[string]int
 	}
-	chapterCounts := make(map[string]map[int]*chapterData)
+	// Rows arrive ordered by chapter within each book, so each book's slice is
+	// already in chapter order and a new entry starts whenever the chapter changes.
+	chapterCounts := make(map[string][]*chapterData)
 	for chRows.Next() {
 		var slug, cat string
 		var ch, n int
 		if err := chRows.Scan(&slug, &ch, &cat, &n); err != nil {
 			log.Fatalf("scanning chapter count: %v", err)
 		}
-		if chapterCounts[slug] == nil {
-			chapterCounts[slug] = make(map[int]*chapterData)
-		}
-		if chapterCounts[slug][ch] == nil {
-			chapterCounts[slug][ch] = &chapterData{byCat: make(map[string]int)}
+		chs := chapterCounts[slug]
+		if len(chs) == 0 || chs[len(chs)-1].ch != ch {
+			chs = append(chs, &chapterData{ch: ch, byCat: make(map[string]int)})
+			chapterCounts[slug] = chs
 		}
-		chapterCounts[slug][ch].total += n
-		chapterCounts[slug][ch].byCat[cat] = n
+		cd := chs[len(chs)-1]
+		cd.total += n
+		cd.byCat[cat] = n
 	}
 	chRows.Close()
 
@@ -503,14 +520,10 @@ func buildIndex(db *sql.DB, onlyBook string) {
 		if onlyBook != "" && book.Slug != onlyBook {
 			continue
 		}
-		counts := chapterCounts[book.Slug]
-		if len(counts) == 0 {
-			continue
-		}
 		var chs []chapterEntry
-		for ch := 1; ch <= book.Chapters; ch++ {
-			if cd, ok := counts[ch]; ok {
-				chs = append(chs, chapterEntry{Ch: ch, Count: cd.total, ByCat: cd.byCat})
+		for _, cd := range chapterCounts[book.Slug] {
+			if cd.ch >= 1 && cd.ch <= book.Chapters {
+				chs = append(chs, chapterEntry{Ch: cd.ch, Count: cd.total, ByCat: cd.byCat})
 			}
 		}
 		if len(chs) > 0 {
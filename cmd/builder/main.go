@@ -7,6 +7,7 @@ for the viewer. Run from the repository root:
 	go run ./cmd/builder               # build everything
 	go run ./cmd/builder --book romans # build only one book
 	go run ./cmd/builder --clean       # delete viewer/data/static/ before building
+	go run ./cmd/builder --fast        # lower zstd level for quicker dev builds
 
 Outputs:
 
@@ -17,7 +18,10 @@ Outputs:
 package main
 
 import (
+	"bytes"
+	"crypto/sha256"
 	"database/sql"
+	"encoding/hex"
 	"encoding/json"
 	"flag"
 	"fmt"
@@ -26,7 +30,9 @@ import (
 	"os"
 	"path/filepath"
 	"runtime"
+	"strconv"
 	"strings"
+	"sync"
 
 	"github.com/klauspost/compress/zstd"
 	_ "modernc.org/sqlite"
@@ -34,11 +40,21 @@ import (
 
 const maxPassageChars = 8000
 
+// zstd compression levels for output files. The default favours small downloads;
+// --fast trades some size for a much quicker build during development.
+const (
+	zstdLevel     = 20
+	zstdLevelFast = 6
+)
+
+var outputZstdLevel = zstdLevel
+
 var (
 	repoRoot       = mustCwd()
 	manuscriptsDir = filepath.Join(repoRoot, "manuscripts")
 	staticDir      = filepath.Join(repoRoot, "viewer", "data", "static")
 	dbPath         = filepath.Join(repoRoot, "data", "patristics.db")
+	manifestPath   = filepath.Join(repoRoot, "data", "build-manifest.json")
 )
 
 func mustCwd() string {
@@ -52,12 +68,18 @@ func mustCwd() string {
 func main() {
 	bookFlag := flag.String("book", "", "Only build files for this book slug")
 	cleanFlag := flag.Bool("clean", false, "Delete data/static/ before building")
+	fastFlag := flag.Bool("fast", false, "Compress output at a lower zstd level for quicker builds")
 	flag.Parse()
 
+	if *fastFlag {
+		outputZstdLevel = zstdLevelFast
+	}
+
 	if *cleanFlag {
 		os.RemoveAll(staticDir)
 		fmt.Printf("Removed %s\n", staticDir)
 	}
+	loadManifest()
 
 	if _, err := os.Stat(dbPath); err != nil {
 		log.Fatalf("Database not found at %s. Run parser.py first.", dbPath)
@@ -87,6 +109,12 @@ func main() {
 		buildWorks(db, cache, gp)
 	}
 	cleanupUncompressed()
+	if err := saveManifest(*bookFlag == ""); err != nil {
+		log.Printf("saving build manifest: %v", err)
+	}
+	if outputsSkipped > 0 {
+		fmt.Printf("Skipped %d unchanged files.\n", outputsSkipped)
+	}
 }
 
 // loadCache reads only the manuscript .txt files that are actually referenced in
@@ -152,8 +180,28 @@ func loadCache(db *sql.DB) (map[string][]rune, error) {
 	return cache, err
 }
 
+// dbPragmas are applied by the driver to every pooled connection. The build
+// reads verse_refs and manuscripts in full several times, so let SQLite serve
+// pages straight from a memory map and keep a large page cache per connection.
+// The builder never writes, so connections are query-only and the GROUP BY /
+// ORDER BY sorters stay in memory.
+var dbPragmas = []string{
+	"mmap_size(268435456)",
+	"cache_size(-131072)",
+	"query_only(1)",
+	"temp_store(MEMORY)",
+}
+
 func openDB(path string) *sql.DB {
-	db, err := sql.Open("sqlite", path)
+	dsn := path
+	for i, p := range dbPragmas {
+		sep := "&"
+		if i == 0 {
+			sep = "?"
+		}
+		dsn += sep + "_pragma=" + p
+	}
+	db, err := sql.Open("sqlite", dsn)
 	if err != nil {
 		log.Fatalf("opening database: %v", err)
 	}
@@ -163,7 +211,107 @@ func openDB(path string) *sql.DB {
 	return db
 }
 
+// zstdEncoders recycles encoders across output files so each write reuses an
+// already-initialised encoder via Reset instead of allocating a new one.
+var zstdEncoders = sync.Pool{
+	New: func() any {
+		zw, err := zstd.NewWriter(nil,
+			zstd.WithEncoderLevel(zstd.EncoderLevelFromZstd(outputZstdLevel)),
+			zstd.WithEncoderConcurrency(1),
+		)
+		if err != nil {
+			log.Fatalf("creating zstd encoder: %v", err)
+		}
+		return zw
+	},
+}
+
+// ── Build manifest ────────────────────────────────────────────────────────────
+
+// The manifest maps each output path (relative to staticDir) to the zstd level
+// and SHA-256 of its uncompressed JSON. On the next run an output whose JSON
+// hashes the same is left alone, skipping the compression and the disk write.
+// Lookups go to the previous run's manifest; this run's outputs, written or
+// skipped, are recorded separately so outputs no longer produced drop out.
+var (
+	manifestMu     sync.Mutex
+	manifest       = make(map[string]string)
+	builtManifest  = make(map[string]string)
+	outputsSkipped int
+)
+
+func loadManifest() {
+	data, err := os.ReadFile(manifestPath)
+	if err != nil {
+		return
+	}
+	var m map[string]string
+	if err := json.Unmarshal(data, &m); err != nil {
+		log.Printf("ignoring unreadable build manifest: %v", err)
+		return
+	}
+	manifest = m
+}
+
+// saveManifest writes the outputs recorded this run. A partial (--book) run
+// only produces some outputs, so with prune false the previous entries are
+// kept and this run's are merged over them.
+func saveManifest(prune bool) error {
+	manifestMu.Lock()
+	defer manifestMu.Unlock()
+	out := builtManifest
+	if !prune {
+		for key, hash := range builtManifest {
+			manifest[key] = hash
+		}
+		out = manifest
+	}
+	data, err := json.MarshalIndent(out, "", "  ")
+	if err != nil {
+		return err
+	}
+	if err := os.MkdirAll(filepath.Dir(manifestPath), 0755); err != nil {
+		return err
+	}
+	return os.WriteFile(manifestPath, data, 0644)
+}
+
+// jsonBuffers recycles the buffers payloads are encoded into, so large book and
+// work payloads don't regrow a fresh buffer from zero on every file.
+var jsonBuffers = sync.Pool{
+	New: func() any { return new(bytes.Buffer) },
+}
+
 func writeZstJSON(path string, payload any) error {
+	buf := jsonBuffers.Get().(*bytes.Buffer)
+	buf.Reset()
+	defer jsonBuffers.Put(buf)
+	enc := json.NewEncoder(buf)
+	enc.SetEscapeHTML(false) // match Python's ensure_ascii=False behaviour for < > &
+	if err := enc.Encode(payload); err != nil {
+		return err
+	}
+	sum := sha256.Sum256(buf.Bytes())
+	// Include the zstd level so switching --fast on or off recompresses everything.
+	hash := strconv.Itoa(outputZstdLevel) + ":" + hex.EncodeToString(sum[:])
+	key := path
+	if rel, err := filepath.Rel(staticDir, path); err == nil {
+		key = filepath.ToSlash(rel)
+	}
+
+	manifestMu.Lock()
+	prev := manifest[key]
+	manifestMu.Unlock()
+	if prev == hash {
+		if _, err := os.Stat(path); err == nil {
+			manifestMu.Lock()
+			builtManifest[key] = hash
+			outputsSkipped++
+			manifestMu.Unlock()
+			return nil
+		}
+	}
+
 	if err := os.MkdirAll(filepath.Dir(path), 0755); err != nil {
 		return err
 	}
@@ -172,16 +320,20 @@ func writeZstJSON(path string, payload any) error {
 		return err
 	}
 	defer f.Close()
-	zw, err := zstd.NewWriter(f, zstd.WithEncoderLevel(zstd.EncoderLevelFromZstd(20)))
-	if err != nil {
+	zw := zstdEncoders.Get().(*zstd.Encoder)
+	defer zstdEncoders.Put(zw)
+	zw.Reset(f)
+	if _, err := zw.Write(buf.Bytes()); err != nil {
 		return err
 	}
-	enc := json.NewEncoder(zw)
-	enc.SetEscapeHTML(false) // match Python's ensure_ascii=False behaviour for < > &
-	if err := enc.Encode(payload); err != nil {
+	if err := zw.Close(); err != nil {
 		return err
 	}
-	return zw.Close()
+
+	manifestMu.Lock()
+	builtManifest[key] = hash
+	manifestMu.Unlock()
+	return nil
 }
 
 func cleanupUncompressed() {
@@ -0,0 +1,28 @@
+"""
+Regenerate src/bible_tables.marshal, the precomputed abbreviation table that
+bible_data.py loads at import instead of rebuilding and re-sorting it.
+
+bible_data.py ignores the sidecar whenever it is older than bible_data.py
+itself, so re-run this after editing BOOKS.
+
+Usage:
+  python src/_build_tables.py
+"""
+import marshal
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bible_data import _TABLES_PATH, _abbrev_table
+
+
+def main() -> None:
+    table = _abbrev_table()
+    with open(_TABLES_PATH, "wb") as f:
+        marshal.dump(table, f)
+    print(f"Wrote {len(table)} abbreviations to {_TABLES_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ Abbreviation notes:
   - Roman numeral book prefixes (I, II, III) are handled separately in the parser
   - "st " prefix handling (St John, St Luke) is handled in the parser
 """
+import marshal
+from pathlib import Path
 
 BOOKS = [
     # ── Old Testament ────────────────────────────────────────────────────────
@@ -193,47 +195,72 @@ BOOKS = [
 # slug → book info
 BY_SLUG: dict[str, dict] = {b["slug"]: b for b in BOOKS}
 
-# canonical name (lowercase) → book info
-BY_NAME: dict[str, dict] = {b["name"].lower(): b for b in BOOKS}
+# Precomputed abbreviation table, regenerated by src/_build_tables.py
+_TABLES_PATH = Path(__file__).with_name("bible_tables.marshal")
 
-# abbreviation (lowercase, no dots) → book info
-# Built from all abbrevs lists; longer matches are preferred
-_abbrev_map: dict[str, dict] = {}
-for _book in BOOKS:
-    for _abbr in _book["abbrevs"]:
-        _abbrev_map[_abbr] = _book
-    # also register the full name
-    _abbrev_map[_book["name"].lower()] = _book
 
-# Sort by length descending so the regex prefers longer matches
-ABBREV_LOOKUP: dict[str, dict] = dict(
-    sorted(_abbrev_map.items(), key=lambda kv: len(kv[0]), reverse=True)
-)
+def _abbrev_table() -> list[tuple[str, int]]:
+    """
+    Build (abbreviation, index into BOOKS) pairs from all abbrevs lists plus the
+    full book names, sorted by length descending so the regex prefers longer
+    matches.
+    """
+    abbrev_map: dict[str, int] = {}
+    for i, book in enumerate(BOOKS):
+        for abbr in book["abbrevs"]:
+            abbrev_map[abbr] = i
+        # also register the full name
+        abbrev_map[book["name"].lower()] = i
+    return sorted(abbrev_map.items(), key=lambda kv: len(kv[0]), reverse=True)
+
+
+def _load_abbrev_table() -> list[tuple[str, int]]:
+    """
+    Load the abbreviation table from the marshal sidecar, falling back to
+    building it in-process when the sidecar is missing, unreadable, or older
+    than this file (i.e. BOOKS may have changed since it was written).
+    """
+    try:
+        if _TABLES_PATH.stat().st_mtime >= Path(__file__).stat().st_mtime:
+            with open(_TABLES_PATH, "rb") as f:
+                return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    return _abbrev_table()
+
+
+# abbreviation (lowercase, no dots) → book info, longest abbreviation first
+ABBREV_LOOKUP: dict[str, dict] = {abbr: BOOKS[i] for abbr, i in _load_abbrev_table()}
 
 # Sorted abbrev list for building the citation regex (longest first)
 ABBREV_LIST: list[str] = list(ABBREV_LOOKUP.keys())
 
 
+# Roman numeral value indexed by ASCII code point (upper and lower case); 0 = not a numeral
+_ROMAN_TBL = [0] * 128
+for _c, _v in zip("IVXLCDM", (1, 5, 10, 50, 100, 500, 1000)):
+    _ROMAN_TBL[ord(_c)] = _ROMAN_TBL[ord(_c.lower())] = _v
+
+
 def roman_to_int(s: str) -> int | None:
     """
     Convert a Roman numeral string to an integer.
     Returns None if the string is not a valid Roman numeral.
     Handles values 1-3999.
     """
-    s = s.upper().strip()
-    vals = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100, "D": 500, "M": 1000}
-    if not s or not all(c in vals for c in s):
-        return None
     total = 0
     prev = 0
-    for ch in reversed(s):
-        v = vals[ch]
+    for ch in reversed(s.strip()):
+        o = ord(ch)
+        v = _ROMAN_TBL[o] if o < 128 else 0
+        if not v:
+            return None
         if v < prev:
             total -= v
         else:
             total += v
         prev = v
-    return total
+    return total or None
 
 
 def is_roman(s: str) -> bool:
@@ -5,18 +5,31 @@ Usage:
     python src/build_kjv.py
 
 Requires: pip install zstandard
+Optional: pip install orjson  (faster JSON encoding; stdlib json is used otherwise)
 """
 
 import json
+import os
 import sys
 import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import zstandard
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 BASE_URL = "https://raw.githubusercontent.com/aruljohn/Bible-kjv/master"
 BOOKS_URL = f"{BASE_URL}/Books.json"
 
 OUT_PATH = "viewer/data/static/kjv.json.zst"
 
+# Concurrent book downloads; the job is bound by HTTP round trips, not CPU.
+FETCH_WORKERS = 16
+
 # Map canonical book names → slugs used by this project
 SLUG_MAP = {
     "Genesis": "genesis",
@@ -88,49 +101,109 @@ SLUG_MAP = {
 }
 
 
+def _dumps(obj) -> bytes:
+    """Compact UTF-8 JSON, via orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
 def fetch(url):
     with urllib.request.urlopen(url, timeout=30) as resp:
         return json.loads(resp.read())
 
 
+def _chapter_map(book_data: dict) -> dict:
+    """Reshape one book's JSON into {chapter: {verse: text}} with string keys."""
+    ch_map = {}
+    for ch in book_data.get("chapters", []):
+        ch_num = str(ch["chapter"])
+        v_map = {}
+        for v in ch.get("verses", []):
+            v_map[str(v["verse"])] = v["text"]
+        ch_map[ch_num] = v_map
+    return ch_map
+
+
+def _fetch_book(book_name):
+    """Fetch one book's JSON, returning (data, None) or (None, exception)."""
+    encoded = book_name.replace(" ", "")
+    try:
+        return fetch(f"{BASE_URL}/{encoded}.json"), None
+    except Exception as e:
+        return None, e
+
+
+def _fetch_books(book_names):
+    """
+    Yield (book_name, (data, error)) in the order given. At most FETCH_WORKERS
+    fetches are in flight at once, so no more than that many finished books
+    wait in memory for the caller to reach them.
+    """
+    names = iter(book_names)
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        window = deque()
+        for name in names:
+            window.append((name, ex.submit(_fetch_book, name)))
+            if len(window) == FETCH_WORKERS:
+                break
+        while window:
+            name, future = window.popleft()
+            # Refill the window before waiting so the pool stays busy
+            following = next(names, None)
+            if following is not None:
+                window.append((following, ex.submit(_fetch_book, following)))
+            yield name, future.result()
+
+
 def main():
     print(f"Fetching book list from {BOOKS_URL} ...")
     book_names = fetch(BOOKS_URL)
 
-    out = {}
+    mapped = []
     for book_name in book_names:
-        slug = SLUG_MAP.get(book_name)
-        if not slug:
+        if book_name in SLUG_MAP:
+            mapped.append(book_name)
+        else:
             print(f"  Skipping unmapped book: {book_name}")
-            continue
-
-        encoded = book_name.replace(" ", "")
-        url = f"{BASE_URL}/{encoded}.json"
-        print(f"  Fetching {book_name} ...")
-        try:
-            book_data = fetch(url)
-        except Exception as e:
-            print(f"  WARNING: failed to fetch {book_name}: {e}", file=sys.stderr)
-            continue
-
-        ch_map = {}
-        for ch in book_data.get("chapters", []):
-            ch_num = str(ch["chapter"])
-            v_map = {}
-            for v in ch.get("verses", []):
-                v_map[str(v["verse"])] = v["text"]
-            ch_map[ch_num] = v_map
-        out[slug] = ch_map
-
-    json_bytes = json.dumps(out, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
-    print(f"\nUncompressed size: {len(json_bytes) / 1024:.1f} KB")
 
+    # Emit the top-level object one book at a time straight into the zstd
+    # stream so the full KJV is never held in memory as a single JSON string.
+    # Books are fetched concurrently and come back in canonical order.
+    # The stream goes to a temp file beside OUT_PATH, which only replaces the
+    # old output once the whole object has been written.
+    tmp_path = f"{OUT_PATH}.tmp"
     cctx = zstandard.ZstdCompressor(level=19)
-    compressed = cctx.compress(json_bytes)
-    print(f"Compressed size:   {len(compressed) / 1024:.1f} KB")
-
-    with open(OUT_PATH, "wb") as f:
-        f.write(compressed)
+    raw_size = 0
+    try:
+        with open(tmp_path, "wb") as f, cctx.stream_writer(f) as sw:
+            sw.write(b"{")
+            first = True
+            for book_name, (book_data, err) in _fetch_books(mapped):
+                if err is not None:
+                    print(f"  WARNING: failed to fetch {book_name}: {err}", file=sys.stderr)
+                    continue
+                print(f"  Fetched {book_name}")
+
+                chunk = (
+                    (b"" if first else b",")
+                    + _dumps(SLUG_MAP[book_name])
+                    + b":"
+                    + _dumps(_chapter_map(book_data))
+                )
+                sw.write(chunk)
+                raw_size += len(chunk)
+                first = False
+            sw.write(b"}")
+            raw_size += 2
+        os.replace(tmp_path, OUT_PATH)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    print(f"\nUncompressed size: {raw_size / 1024:.1f} KB")
+    print(f"Compressed size:   {os.path.getsize(OUT_PATH) / 1024:.1f} KB")
     print(f"Written to {OUT_PATH}")
 
 
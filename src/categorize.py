@@ -12,6 +12,7 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import json
 import re
 import sys
 from collections import Counter
@@ -22,10 +23,20 @@ sys.path.insert(0, str(Path(__file__).parent))
 from db import get_connection, DB_PATH
 
 MANUSCRIPTS_DIR = Path(__file__).parent.parent / "manuscripts"
+SUBJECTS_CACHE_PATH = MANUSCRIPTS_DIR / ".subjects_cache.json"
+
+# _parse_ccel_subjects only looks at the first 4000 characters; 4 bytes per
+# character is the UTF-8 worst case, so this many bytes always covers them.
+_HEADER_READ_BYTES = 4 * 4000
 
 
 # ── CCEL subjects extraction ───────────────────────────────────────────────────
 
+# Header block delimiter (a run of underscores) and the subjects line within it
+_SEP_RE = re.compile(r'_{10,}')
+_CCEL_SUBJECTS_RE = re.compile(r'^\s*CCEL Subjects:\s*(.+)', re.MULTILINE | re.IGNORECASE)
+
+
 def _parse_ccel_subjects(text: str) -> set[str]:
     """
     Extract the CCEL Subjects field from a manuscript header and return a
@@ -33,64 +44,97 @@ def _parse_ccel_subjects(text: str) -> set[str]:
 
     E.g. "CCEL Subjects: All; Classic; Early;" → {"all", "classic", "early"}
     """
-    sep_re = re.compile(r'_{10,}')
-    matches = list(sep_re.finditer(text, 0, 4000))
+    matches = list(_SEP_RE.finditer(text, 0, 4000))
     if len(matches) < 2:
         return set()
     header = text[matches[0].end():matches[1].start()]
-    m = re.search(r'^\s*CCEL Subjects:\s*(.+)', header, re.MULTILINE | re.IGNORECASE)
+    m = _CCEL_SUBJECTS_RE.search(header)
     if not m:
         return set()
     raw = m.group(1)
     return {s.strip().lower() for s in raw.split(';') if s.strip()}
 
 
+def _load_subjects_cache() -> dict[str, list]:
+    try:
+        return json.loads(SUBJECTS_CACHE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_subjects_cache(cache: dict[str, list]) -> None:
+    try:
+        SUBJECTS_CACHE_PATH.write_text(json.dumps(cache, ensure_ascii=False), encoding="utf-8")
+    except OSError as exc:
+        print(f"  Warning: could not write {SUBJECTS_CACHE_PATH.name}: {exc}")
+
+
+def _subjects_for(path: Path, cache: dict[str, list]) -> set[str]:
+    """
+    Return the CCEL subjects for a manuscript file, reading only its header.
+
+    Results are cached by path, mtime and size so unchanged files are not
+    re-read on later runs.
+    """
+    st = path.stat()
+    key = path.relative_to(MANUSCRIPTS_DIR).as_posix()
+    hit = cache.get(key)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return set(hit[2])
+    with path.open("rb") as fh:
+        text = fh.read(_HEADER_READ_BYTES).decode("utf-8", errors="replace")
+    subjects = _parse_ccel_subjects(text)
+    cache[key] = [st.st_mtime_ns, st.st_size, sorted(subjects)]
+    return subjects
+
+
 # ── Category determination ─────────────────────────────────────────────────────
 
-# Known author surname fragments mapped to their category (lower-cased).
+# Known author surnames per category (lower-cased), matched against the words
+# of the author field.
 # Order matters only within each call — the function checks these in a defined
 # priority sequence, not by dict order.
-_PATRISTICS_AUTHORS = {
+_PATRISTICS_AUTHORS = frozenset({
     "augustine", "athanasius", "cassian", "chrysostom", "origen",
     "jerome", "ambrose", "basil", "gregory", "cyprian", "tertullian",
     "irenaeus", "clement", "eusebius", "lactantius", "hilary", "leo",
     "cyril", "ephrem", "ignatius", "polycarp", "papias", "dionysius",
-}
+})
 
-_MEDIEVAL_AUTHORS = {
+_MEDIEVAL_AUTHORS = frozenset({
     "eckhart", "bonaventure", "bernard", "anselm", "matelda", "aquinas",
     "guyon", "tauler", "rolle", "hilton", "kempe", "kempis", "fenelon",
     "law",  # William Law — 18th c. but deeply mystical/medieval in character
-}
+})
 
-_REFORMATION_AUTHORS = {
+_REFORMATION_AUTHORS = frozenset({
     "calvin", "luther", "melanchthon", "zwingli", "knox", "tyndale",
     "cranmer", "beza", "bucer", "bullinger", "erasmus",
-}
+})
 
-_PURITAN_AUTHORS = {
+_PURITAN_AUTHORS = frozenset({
     "owen", "baxter", "bunyan", "flavel", "goodwin", "watson", "boston",
     "manton", "howe", "gurnall", "charnock", "sibbes", "allestree",
     "mason", "rutherford", "mead", "vincent", "swinnock", "love",
     "edwards", "shepard", "fisher",  # Shepard (Puritan), Fisher (Marrow of Divinity)
     "arndt",   # Johann Arndt — German Lutheran proto-Pietist (pre-Puritan era but closely aligned)
-}
+})
 
-_SERMON_AUTHORS = {
+_SERMON_AUTHORS = frozenset({
     "spurgeon", "maclaren", "moody", "whyte", "dods",
-}
+})
 
-_SYSTEMATIC_AUTHORS = {
+_SYSTEMATIC_AUTHORS = frozenset({
     "berkhof", "bavinck", "hodge", "warfield", "turretin", "dabney",
     "kuyper", "forsyth",
-}
+})
 
-_APOLOGETICS_AUTHORS = {
+_APOLOGETICS_AUTHORS = frozenset({
     "chesterton", "macdonald", "kierkegaard", "plantinga", "lewis",
     "pascal", "newman", "sayers", "coleridge",
-}
+})
 
-_DEVOTIONAL_AUTHORS = {
+_DEVOTIONAL_AUTHORS = frozenset({
     "murray", "pink", "torrey", "smith",  # Hannah Whitall Smith
     "gordon",  # S.D. Gordon (Quiet Talks series)
     "havergal", "underhill",  # Evelyn Underhill (20th c. mysticism writer)
@@ -105,11 +149,61 @@ _DEVOTIONAL_AUTHORS = {
     "pasko",   # Mark Pasko — contemporary devotional
     "inge",    # W.R. Inge — Anglican mysticism/apologetics
     "oman",    # John Oman — Scottish Presbyterian theology
-}
+})
+
+
+# Title keyword groups. Each group is compiled into one alternation so a title
+# is scanned once per group instead of once per keyword.
+_SCRIPTURE_TITLE_KWS = {"catechism", "confession of faith", "heidelberg",
+                        "westminster", "book of jasher", "book of common prayer",
+                        "augsburg confession", "apology of the augsburg",
+                        "scottish confession", "scots confession"}
+_FATHERS_SEE_KWS = {"alexandria", "hippo", "antioch", "carthage", "caesarea"}
+_CH_HISTORY_TITLE_KWS = {"eirenicon", "primitive christianity", "rise and progress",
+                          "american religious movement"}
+_REFORMATION_TITLE_KWS = {"institutes", "bondage of the will", "small catechism",
+                           "large catechism", "smalcald", "formula of concord",
+                           "thirty-nine articles", "confutatio", "pulpit of the reformation"}
+_DEVOTIONAL_TITLE_KWS = {"devotion", "prayer", "meditation", "spiritual",
+                         "way of peace", "way of holiness", "holy living",
+                         "mortification", "imitation", "uniformity", "piety",
+                         "the soul of", "waiting on", "with christ",
+                         "comfort for", "christian's secret", "kept for",
+                         "love enthroned", "plain account of christian"}
+_HYMN_TITLE_KWS = {"hymn", "hymns", "psalms and hymns", "spiritual songs", "sacred songs",
+                   "night thoughts", "religious poems", "poetical works", "divine songs",
+                   "sacred hymns"}
+_MORE_DEVOTIONAL_TITLE_KWS = {"light and peace", "holy life", "in his steps",
+                              "to my younger", "comfort against", "sufferings of christ",
+                              "maxims of the saints", "meditating on scripture",
+                              "reflections on the christian", "quiet talks"}
+
+
+def _any_substring_re(words: set[str]) -> re.Pattern:
+    """Compile a pattern that matches wherever any of ``words`` occurs as a substring."""
+    return re.compile("|".join(re.escape(w) for w in sorted(words, key=len, reverse=True)))
+
 
+_SCRIPTURE_TITLE_RE = _any_substring_re(_SCRIPTURE_TITLE_KWS)
+_FATHERS_SEE_RE = _any_substring_re(_FATHERS_SEE_KWS)
+_CH_HISTORY_TITLE_RE = _any_substring_re(_CH_HISTORY_TITLE_KWS)
+_REFORMATION_TITLE_RE = _any_substring_re(_REFORMATION_TITLE_KWS)
+_DEVOTIONAL_TITLE_RE = _any_substring_re(_DEVOTIONAL_TITLE_KWS)
+_HYMN_TITLE_RE = _any_substring_re(_HYMN_TITLE_KWS)
+_MORE_DEVOTIONAL_TITLE_RE = _any_substring_re(_MORE_DEVOTIONAL_TITLE_KWS)
 
-def _author_matches(author_lower: str, names: set[str]) -> bool:
-    return any(n in author_lower for n in names)
+
+# Title patterns used by determine_category
+_EXPOSITION_RE = re.compile(r'(an? )?exposition of\b')
+_SAINT_OF_PLACE_RE = re.compile(r'\bst\.?\s+\w+ of \w+')
+_LIFE_OF_RE = re.compile(r'^(life of|lives of)\b')
+
+
+_WORD_RE = re.compile(r'[a-z]+')
+
+
+def _author_matches(author_tokens: set[str], names: frozenset[str]) -> bool:
+    return not names.isdisjoint(author_tokens)
 
 
 def determine_category(
@@ -122,6 +216,7 @@ def determine_category(
     fn = filename.lower()
     al = (author or "").lower()
     tl = (title or "").lower()
+    at = set(_WORD_RE.findall(al))
     subj = ccel_subjects  # already lower-cased
 
     # 0. Ante-Nicene / Nicene Fathers series (NPNF/ANF collections edited by Schaff)
@@ -134,7 +229,7 @@ def determine_category(
         return "Biblical Commentary"
     if "commentary" in tl or "commentary" in fn:
         return "Biblical Commentary"
-    if re.match(r'(an? )?exposition of\b', tl):
+    if _EXPOSITION_RE.match(tl):
         return "Biblical Commentary"
     # Word Pictures, Bible studies, synthetic studies, etc.
     if "word pictures" in tl or "bible studies" in tl or "synthetic bible" in tl:
@@ -143,11 +238,7 @@ def determine_category(
     # 2. Scripture — Bible texts, catechisms, confessions of faith
     if "bibles" in subj or "bible" in subj:
         return "Scripture"
-    scripture_title_kws = {"catechism", "confession of faith", "heidelberg",
-                           "westminster", "book of jasher", "book of common prayer",
-                           "augsburg confession", "apology of the augsburg",
-                           "scottish confession", "scots confession"}
-    if any(k in tl for k in scripture_title_kws):
+    if _SCRIPTURE_TITLE_RE.search(tl):
         return "Scripture"
 
     # 3. Patristics — CCEL "Early" / "Early Church", year < 600, or known author
@@ -155,14 +246,13 @@ def determine_category(
         return "Patristics"
     if year and year < 600:
         return "Patristics"
-    if _author_matches(al, _PATRISTICS_AUTHORS):
+    if _author_matches(at, _PATRISTICS_AUTHORS):
         return "Patristics"
     # Works *about* the apostolic/early church fathers by later scholars
     if "apostolic fathers" in tl or "early christian" in tl or "early church" in tl:
         return "Patristics"
     # Secondary works on individual church fathers (e.g. "St. Dionysius of Alexandria")
-    if re.search(r'\bst\.?\s+\w+ of \w+', tl) and any(
-            k in tl for k in {"alexandria", "hippo", "antioch", "carthage", "caesarea"}):
+    if _SAINT_OF_PLACE_RE.search(tl) and _FATHERS_SEE_RE.search(tl):
         return "Patristics"
 
     # 4. Medieval — CCEL "Mysticism", year 600-1500, or known medieval author
@@ -170,14 +260,14 @@ def determine_category(
         return "Medieval"
     if year and 600 <= year < 1500:
         return "Medieval"
-    if _author_matches(al, _MEDIEVAL_AUTHORS):
+    if _author_matches(at, _MEDIEVAL_AUTHORS):
         return "Medieval"
     # Cloud of Unknowing is anonymous — catch by filename
     if "cloud" in fn:
         return "Medieval"
 
     # 5. Systematic Theology — before Church History so "Systematic Theology" titles win
-    if _author_matches(al, _SYSTEMATIC_AUTHORS):
+    if _author_matches(at, _SYSTEMATIC_AUTHORS):
         return "Systematic Theology"
     if "systematic theology" in tl or "dogmatics" in tl or "dogmatic theology" in tl:
         return "Systematic Theology"
@@ -193,63 +283,45 @@ def determine_category(
     if "menno simons" in al or "menno simon" in al:
         return "Church History"
     # Biographies and hagiographies
-    if re.match(r'^(life of|lives of)\b', tl):
+    if _LIFE_OF_RE.match(tl):
         return "Church History"
-    ch_history_title_kws = {"eirenicon", "primitive christianity", "rise and progress",
-                             "american religious movement"}
-    if any(k in tl for k in ch_history_title_kws):
+    if _CH_HISTORY_TITLE_RE.search(tl):
         return "Church History"
 
     # 7. Reformation — known Reformation authors or document titles
-    if _author_matches(al, _REFORMATION_AUTHORS):
+    if _author_matches(at, _REFORMATION_AUTHORS):
         return "Reformation"
-    reformation_title_kws = {"institutes", "bondage of the will", "small catechism",
-                              "large catechism", "smalcald", "formula of concord",
-                              "thirty-nine articles", "confutatio", "pulpit of the reformation"}
-    if any(k in tl for k in reformation_title_kws):
+    if _REFORMATION_TITLE_RE.search(tl):
         return "Reformation"
 
     # 8. Puritan — known Puritan authors
-    if _author_matches(al, _PURITAN_AUTHORS):
+    if _author_matches(at, _PURITAN_AUTHORS):
         return "Puritan"
 
     # 9. Sermons — known sermon preachers or "sermon" in title/filename
-    if _author_matches(al, _SERMON_AUTHORS):
+    if _author_matches(at, _SERMON_AUTHORS):
         return "Sermons"
     if "sermon" in tl or "sermon" in fn:
         return "Sermons"
 
     # 10. Apologetics — known apologetics authors or apologetics keywords in title
-    if _author_matches(al, _APOLOGETICS_AUTHORS):
+    if _author_matches(at, _APOLOGETICS_AUTHORS):
         return "Apologetics"
     if "apologetics" in tl or "defence of" in tl or "defense of" in tl:
         return "Apologetics"
 
     # 11. Devotional — known devotional authors, CCEL "Christian Life", or keywords
-    if _author_matches(al, _DEVOTIONAL_AUTHORS):
+    if _author_matches(at, _DEVOTIONAL_AUTHORS):
         return "Devotional"
     if "christian life" in subj:
         return "Devotional"
-    devotional_kws = {"devotion", "prayer", "meditation", "spiritual",
-                      "way of peace", "way of holiness", "holy living",
-                      "mortification", "imitation", "uniformity", "piety",
-                      "the soul of", "waiting on", "with christ",
-                      "comfort for", "christian's secret", "kept for",
-                      "love enthroned", "plain account of christian"}
-    if any(k in tl for k in devotional_kws):
+    if _DEVOTIONAL_TITLE_RE.search(tl):
         return "Devotional"
     # Hymns and devotional poetry
-    hymn_kws = {"hymn", "hymns", "psalms and hymns", "spiritual songs", "sacred songs",
-                "night thoughts", "religious poems", "poetical works", "divine songs",
-                "sacred hymns"}
-    if any(k in tl for k in hymn_kws) or "hymn" in fn:
+    if _HYMN_TITLE_RE.search(tl) or "hymn" in fn:
         return "Devotional"
     # More devotional title patterns
-    more_devotional_kws = {"light and peace", "holy life", "in his steps",
-                           "to my younger", "comfort against", "sufferings of christ",
-                           "maxims of the saints", "meditating on scripture",
-                           "reflections on the christian", "quiet talks"}
-    if any(k in tl for k in more_devotional_kws):
+    if _MORE_DEVOTIONAL_TITLE_RE.search(tl):
         return "Devotional"
     # Biblical reference works
     if "helps to the study" in tl or "revision revised" in tl or "word pictures" in tl:
@@ -294,6 +366,7 @@ def categorise_all(dry_run: bool = False) -> None:
 
     tally: Counter = Counter()
     updates = []
+    subjects_cache = _load_subjects_cache()
 
     for row in rows:
         manuscript_id = row["id"]
@@ -302,18 +375,16 @@ def categorise_all(dry_run: bool = False) -> None:
         title = row["title"]
         year = row["year"]
 
-        # Try to read the file for CCEL subjects
-        path = MANUSCRIPTS_DIR / filename
-        if not path.exists():
-            # Try archive subdirectory
-            path = MANUSCRIPTS_DIR / "archive" / filename
+        # Try to read the file for CCEL subjects, falling back to the archive subdirectory
         subjects: set[str] = set()
-        if path.exists():
+        for path in (MANUSCRIPTS_DIR / filename, MANUSCRIPTS_DIR / "archive" / filename):
             try:
-                text = path.read_text(encoding="utf-8", errors="replace")
-                subjects = _parse_ccel_subjects(text)
+                subjects = _subjects_for(path, subjects_cache)
+            except FileNotFoundError:
+                continue
             except OSError:
                 pass
+            break
 
         category = determine_category(filename, author, title, year, subjects)
         tally[category] += 1
@@ -322,6 +393,8 @@ def categorise_all(dry_run: bool = False) -> None:
         line = f"  [{category:22s}]  {author or 'Unknown':30s}  {title or filename}"
         print(line.encode(sys.stdout.encoding or "utf-8", errors="replace").decode(sys.stdout.encoding or "utf-8", errors="replace"))
 
+    _save_subjects_cache(subjects_cache)
+
     if not dry_run:
         with conn:
             conn.executemany(
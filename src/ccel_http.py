@@ -0,0 +1,55 @@
+"""
+HTTP plumbing shared by the CCEL downloaders, scraper.py and fetch_thml.py:
+pooled, retrying requests sessions (one per worker thread) and the bits of
+index-page handling both of them need.
+"""
+import threading
+
+import lxml.html
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Bytes per read when streaming a download to disk
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# A cached index page younger than this is used as-is; an older one is
+# revalidated with a conditional GET.
+INDEX_CACHE_TTL = 24 * 60 * 60
+
+# requests.Session is not thread-safe, so each download worker gets its own
+_thread_local = threading.local()
+
+
+def make_session(headers: dict[str, str]) -> requests.Session:
+    """
+    A session sending *headers* that keeps connections to CCEL alive and
+    retries rate limiting and transient server errors with exponential
+    backoff, waiting as long as a Retry-After header asks.
+    """
+    session = requests.Session()
+    session.headers.update(headers)
+    retry = Retry(
+        total=5,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def thread_session(headers: dict[str, str]) -> requests.Session:
+    """Return the calling thread's session, made with *headers* on first use."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _thread_local.session = make_session(headers)
+    return session
+
+
+def link_text(a: lxml.html.HtmlElement) -> str:
+    """Concatenate the stripped text pieces of an anchor, like BeautifulSoup's get_text(strip=True)."""
+    return "".join(t.strip() for t in a.itertext() if t.strip())
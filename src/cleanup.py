@@ -13,8 +13,10 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import shutil
+import json
+import os
 import sys
+from collections import Counter
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
@@ -32,49 +34,76 @@ DELETE_ENTIRELY = {"bible_asv.txt"}
 PURGE_REFS = {"chesterton_queertrades.txt"}
 
 
-def remove_manuscript(conn, manuscript_id: int, filename: str, dry_run: bool) -> None:
-    """Delete verse_refs and the manuscripts row for the given id."""
-    if not dry_run:
-        conn.execute("DELETE FROM verse_refs WHERE manuscript_id = ?", (manuscript_id,))
-        conn.execute("DELETE FROM manuscripts WHERE id = ?", (manuscript_id,))
-
-
-def main() -> None:
-    ap = argparse.ArgumentParser(description="Clean up the patristics database")
-    ap.add_argument("--dry-run", action="store_true",
-                    help="Report what would be done without modifying anything")
-    args = ap.parse_args()
-
-    dry = args.dry_run
-    prefix = "[DRY RUN] " if dry else ""
-
-    if not DB_PATH.exists():
-        print(f"Database not found: {DB_PATH}", file=sys.stderr)
-        sys.exit(1)
-
-    conn = get_connection()
+def _manuscripts_named(conn, filenames: set[str]) -> dict:
+    """Return {filename: row} for the manuscripts with the given filenames, in one query."""
+    rows = conn.execute(
+        "SELECT id, filename, author, title FROM manuscripts "
+        "WHERE filename IN (SELECT value FROM json_each(?))",
+        (json.dumps(sorted(filenames)),),
+    )
+    return {row["filename"]: row for row in rows}
+
+
+def _refs_per_manuscript(conn, manuscript_ids: list[int], delete: bool = False) -> Counter:
+    """
+    Count verse_refs per manuscript id. With *delete*, the refs are removed
+    by the same statement via RETURNING.
+    """
+    if delete:
+        sql = ("DELETE FROM verse_refs WHERE manuscript_id IN (SELECT value FROM json_each(?)) "
+               "RETURNING manuscript_id")
+    else:
+        sql = "SELECT manuscript_id FROM verse_refs WHERE manuscript_id IN (SELECT value FROM json_each(?))"
+    return Counter(mid for (mid,) in conn.execute(sql, (json.dumps(manuscript_ids),)))
+
+
+def remove_manuscripts(conn, manuscript_ids: list[int]) -> None:
+    """
+    Delete verse_refs and the manuscripts rows for the given ids.
+
+    The ids are bound as one JSON array so each table is swept by a single
+    statement regardless of how many manuscripts are removed.
+    """
+    if not manuscript_ids:
+        return
+    ids_json = json.dumps(manuscript_ids)
+    conn.execute(
+        "DELETE FROM verse_refs WHERE manuscript_id IN (SELECT value FROM json_each(?))",
+        (ids_json,),
+    )
+    conn.execute(
+        "DELETE FROM manuscripts WHERE id IN (SELECT value FROM json_each(?))",
+        (ids_json,),
+    )
+
+
+def run_cleanup(conn, dry: bool, prefix: str) -> None:
+    """Run the three cleanup steps against an open connection."""
+    # Look up every manuscript named by Steps 1 and 2 in a single query
+    by_filename = _manuscripts_named(conn, DELETE_ENTIRELY | PURGE_REFS)
 
     # ------------------------------------------------------------------ #
     # Step 1: hard-delete the ASV (and anything else in DELETE_ENTIRELY)  #
     # ------------------------------------------------------------------ #
     print("=== Step 1: Hard-delete manuscripts ===")
+    found = {f: by_filename[f] for f in DELETE_ENTIRELY if f in by_filename}
+    ids = [row["id"] for row in found.values()]
+    ref_counts = _refs_per_manuscript(conn, ids, delete=not dry)
+    if not dry:
+        remove_manuscripts(conn, ids)
+        for filename in found:
+            del by_filename[filename]
     for filename in sorted(DELETE_ENTIRELY):
-        row = conn.execute(
-            "SELECT id, author, title FROM manuscripts WHERE filename = ?", (filename,)
-        ).fetchone()
+        row = found.get(filename)
         if row is None:
             print(f"  {filename}: not found in database, skipping")
             continue
 
-        ref_count = conn.execute(
-            "SELECT COUNT(*) FROM verse_refs WHERE manuscript_id = ?", (row["id"],)
-        ).fetchone()[0]
-
+        ref_count = ref_counts[row["id"]]
         print(f"  {prefix}DELETE  {filename}  ({row['author']}, \"{row['title']}\", {ref_count} refs)")
 
         src = MANUSCRIPTS_DIR / filename
         if not dry:
-            remove_manuscript(conn, row["id"], filename, dry_run=False)
             if src.exists():
                 src.unlink()
                 print(f"  {prefix}  -> deleted file {src}")
@@ -85,33 +114,30 @@ def main() -> None:
     # Step 2: purge false-positive refs                                   #
     # ------------------------------------------------------------------ #
     print("\n=== Step 2: Purge false-positive verse_refs ===")
+    found = {f: by_filename[f] for f in PURGE_REFS if f in by_filename}
+    ref_counts = _refs_per_manuscript(conn, [row["id"] for row in found.values()], delete=not dry)
     for filename in sorted(PURGE_REFS):
-        row = conn.execute(
-            "SELECT id, author, title FROM manuscripts WHERE filename = ?", (filename,)
-        ).fetchone()
+        row = found.get(filename)
         if row is None:
             print(f"  {filename}: not found in database, skipping")
             continue
 
-        ref_count = conn.execute(
-            "SELECT COUNT(*) FROM verse_refs WHERE manuscript_id = ?", (row["id"],)
-        ).fetchone()[0]
-
+        ref_count = ref_counts[row["id"]]
         print(f"  {prefix}PURGE REFS  {filename}  ({ref_count} refs removed)")
-        if not dry:
-            conn.execute("DELETE FROM verse_refs WHERE manuscript_id = ?", (row["id"],))
 
     # ------------------------------------------------------------------ #
     # Step 3: archive all manuscripts with zero verse_refs                #
     # ------------------------------------------------------------------ #
     print("\n=== Step 3: Archive zero-ref manuscripts ===")
-    zero_ref_rows = conn.execute(
+    # Plain tuples rather than sqlite3.Row: this can be a long list and every
+    # column is unpacked positionally below.
+    cur = conn.cursor()
+    cur.row_factory = None
+    zero_ref_rows = cur.execute(
         """
         SELECT m.id, m.filename, m.author, m.title
         FROM manuscripts m
-        LEFT JOIN verse_refs vr ON vr.manuscript_id = m.id
-        GROUP BY m.id
-        HAVING COUNT(vr.id) = 0
+        WHERE NOT EXISTS (SELECT 1 FROM verse_refs vr WHERE vr.manuscript_id = m.id)
         ORDER BY m.author, m.filename
         """
     ).fetchall()
@@ -122,26 +148,59 @@ def main() -> None:
         if not dry:
             ARCHIVE_DIR.mkdir(exist_ok=True)
 
-        for row in zero_ref_rows:
-            src = MANUSCRIPTS_DIR / row["filename"]
-            dst = ARCHIVE_DIR / row["filename"]
-            print(f"  {prefix}ARCHIVE  {row['filename']}  ({row['author']}, \"{row['title']}\")")
+        for _mid, filename, author, title in zero_ref_rows:
+            src = MANUSCRIPTS_DIR / filename
+            dst = ARCHIVE_DIR / filename
+            print(f"  {prefix}ARCHIVE  {filename}  ({author}, \"{title}\")")
             if not dry:
                 if src.exists():
-                    shutil.move(str(src), str(dst))
+                    os.replace(src, dst)  # archive/ is a sibling dir, so this is a rename
                     print(f"  {prefix}  -> moved to archive/")
                 else:
                     print(f"  {prefix}  -> file not found on disk: {src}")
-                remove_manuscript(conn, row["id"], row["filename"], dry_run=False)
+
+        if not dry:
+            remove_manuscripts(conn, [mid for mid, *_ in zero_ref_rows])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Clean up the patristics database")
+    ap.add_argument("--dry-run", action="store_true",
+                    help="Report what would be done without modifying anything")
+    args = ap.parse_args()
+
+    dry = args.dry_run
+    prefix = "[DRY RUN] " if dry else ""
+
+    if not DB_PATH.exists():
+        print(f"Database not found: {DB_PATH}", file=sys.stderr)
+        sys.exit(1)
+
+    conn = get_connection()
 
     # ------------------------------------------------------------------ #
-    # Commit and summarise                                                 #
+    # Run all steps in one write transaction and summarise                #
     # ------------------------------------------------------------------ #
-    if not dry:
-        conn.commit()
-        print("\nDatabase changes committed.")
-    else:
+    if dry:
+        run_cleanup(conn, dry, prefix)
         print("\n[DRY RUN] No changes made.")
+    else:
+        # Take the write lock up front and check foreign keys once at COMMIT
+        # rather than after every DELETE.
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("PRAGMA defer_foreign_keys=ON")
+        try:
+            run_cleanup(conn, dry, prefix)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        print("\nDatabase changes committed.")
+        # Fold the deleted pages back into the main file and shrink the WAL to
+        # zero so the builder doesn't read through a bloated log afterwards.
+        busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+        if busy:
+            print("WAL checkpoint incomplete: another connection is using the database")
 
     conn.close()
 
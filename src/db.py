@@ -8,9 +8,19 @@ DB_PATH = Path(__file__).parent.parent / "data" / "patristics.db"
 
 
 def get_connection(db_path: Path = DB_PATH) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
+    # Every statement here is a constant string, so a larger prepared-statement
+    # cache lets the per-file upserts, deletes and inserts skip re-parsing.
+    conn = sqlite3.connect(db_path, cached_statements=256)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode NORMAL only fsyncs at checkpoints; commits stay durable
+    # against application crashes, which is all a rebuildable DB needs.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # 64 MiB page cache, in-memory sorter/temp tables and memory-mapped reads
+    # for the bulk parse, categorise and cleanup passes.
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
     conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
@@ -83,6 +93,37 @@ def upsert_manuscript(conn: sqlite3.Connection, filename: str, author: str | Non
     return cur.lastrowid
 
 
+VERSE_REF_INSERT_SQL = """INSERT INTO verse_refs
+    (manuscript_id, book, book_slug, chapter,
+     verse_start, verse_end,
+     citation_offset, passage_start_offset, passage_end_offset)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
+class RowBuffer:
+    """
+    Accumulates rows for one INSERT statement across many files and writes
+    them with executemany in chunks of *chunk* rows. Call flush() before
+    committing to write whatever is left.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, sql: str, chunk: int = 10_000) -> None:
+        self.conn = conn
+        self.sql = sql
+        self.chunk = chunk
+        self._rows: list[tuple] = []
+
+    def extend(self, rows: list[tuple]) -> None:
+        self._rows.extend(rows)
+        if len(self._rows) >= self.chunk:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._rows:
+            self.conn.executemany(self.sql, self._rows)
+            self._rows = []
+
+
 def delete_refs_for_manuscript(conn: sqlite3.Connection, manuscript_id: int) -> None:
     """Remove all verse_refs for a manuscript so it can be re-parsed cleanly."""
     conn.execute("DELETE FROM verse_refs WHERE manuscript_id = ?", (manuscript_id,))
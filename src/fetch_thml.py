@@ -3,24 +3,45 @@ Download ThML XML files from CCEL.
 
 Crawls https://ccel.org/index/format/ThML to discover all works available in
 ThML format, then downloads each one to ccel_thml/{authorID}/{bookID}.xml.
-A manifest.json records the status of every attempted download.
+A manifest.json records the status of every attempted download. While a crawl
+runs, each result is also appended to manifest.jsonl, so an interrupted run
+resumes from where it stopped; the journal is folded into manifest.json when
+the run finishes.
 
 Usage:
   python src/fetch_thml.py                    # download all (resumable)
   python src/fetch_thml.py --limit 10         # first 10 only (for testing)
   python src/fetch_thml.py --delay 1.0        # polite crawl delay in seconds
   python src/fetch_thml.py --force            # re-download even cached files
+  python src/fetch_thml.py --workers 4        # number of parallel downloads
+  python src/fetch_thml.py --finalize         # rebuild manifest.json from an interrupted run's journal
+
+Optional: pip install orjson  (faster manifest encoding; stdlib json is used otherwise)
 """
 from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Allow running from project root or src/
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ccel_http import DOWNLOAD_CHUNK_SIZE, INDEX_CACHE_TTL, link_text, make_session, thread_session
 
 BASE_URL = "https://ccel.org"
 INDEX_URL = "https://ccel.org/index/format/ThML"
@@ -28,23 +49,110 @@ INDEX_URL = "https://ccel.org/index/format/ThML"
 PROJECT_ROOT = Path(__file__).parent.parent
 OUTPUT_DIR = PROJECT_ROOT / "manuscripts" / "ccel_thml"
 MANIFEST_PATH = OUTPUT_DIR / "manifest.json"
+MANIFEST_JOURNAL_PATH = OUTPUT_DIR / "manifest.jsonl"
+
+# Local copy of the index page plus the validators it was served with
+INDEX_CACHE_PATH = OUTPUT_DIR / "_index.html"
+INDEX_META_PATH = OUTPUT_DIR / "_index.json"
+
+USER_AGENT = (
+    "PatristicsResearchBot/1.0 (academic scripture citation research; "
+    "contact: see github.com/patristics)"
+)
+HEADERS = {"User-Agent": USER_AGENT}
+
+# Parallel download workers; together they start at most one work per --delay
+DEFAULT_WORKERS = 8
 
 # Work URL pattern on CCEL: /ccel/{authorID}/{bookID}[.html]
-_WORK_PATH_RE = re.compile(r"^/ccel/([^/]+)/([^/]+?)(?:\.[a-z]+)?$")
+_WORK_PATH_RE = re.compile(r"^/ccel/([^/]+)/([^/]+?)(?:\.[a-z]+)?$", re.ASCII)
 
+# Path part of an href, i.e. everything before any query string or fragment
+_HREF_PATH_RE = re.compile(r"[^?#]*")
+
+# Author directories already created this run, so each is mkdir'd only once.
+# Adding the same Path from two threads at once is harmless.
+_DIRS_MADE: set[Path] = set()
+
+# Index into the candidate URL list of the shape that last worked for each
+# author. Works by one author are usually laid out the same way, so that shape
+# is tried first for the rest of them.
+_AUTHOR_PATTERN_HITS: dict[str, int] = {}
+
+
+class RequestPacer:
+    """
+    Thread-safe request spacing. Each wait() returns at least *interval*
+    seconds after the previous one, however many threads are calling it, so
+    the workers together keep the pace of a single serial crawler.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        # Reserve a slot under the lock, then sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _index_html(session: requests.Session) -> str:
+    """Return the index page HTML, from the local cache when it is fresh or unchanged."""
+    try:
+        age = time.time() - INDEX_CACHE_PATH.stat().st_mtime
+    except FileNotFoundError:
+        age = None
+    if age is not None and age < INDEX_CACHE_TTL:
+        print(f"Using cached index: {INDEX_CACHE_PATH}")
+        return INDEX_CACHE_PATH.read_text(encoding="utf-8")
 
-def fetch_index(session: requests.Session) -> list[dict]:
-    """Scrape the CCEL ThML index page and return a list of work dicts."""
     print(f"Fetching index: {INDEX_URL}")
-    resp = session.get(INDEX_URL, timeout=30)
+    headers = {}
+    if age is not None:
+        try:
+            meta = json.loads(INDEX_META_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    resp = session.get(INDEX_URL, timeout=30, headers=headers)
+    if resp.status_code == 304:
+        print("  Index unchanged; using cached copy")
+        INDEX_CACHE_PATH.touch()  # restart the TTL
+        return INDEX_CACHE_PATH.read_text(encoding="utf-8")
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+
+    html = resp.text
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    INDEX_CACHE_PATH.write_text(html, encoding="utf-8")
+    INDEX_META_PATH.write_text(json.dumps({
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }), encoding="utf-8")
+    return html
+
+
+def fetch_index(session: requests.Session) -> list[dict]:
+    """Scrape the CCEL ThML index page and return a list of work dicts."""
+    tree = lxml.html.fromstring(_index_html(session))
 
     seen: set[str] = set()
     works: list[dict] = []
 
-    for a in soup.find_all("a", href=True):
-        href = a["href"].split("?")[0].split("#")[0].rstrip("/")
+    for a in tree.iter("a"):
+        raw_href = a.get("href")
+        if raw_href is None:
+            continue
+        href = _HREF_PATH_RE.match(raw_href).group().rstrip("/")
         m = _WORK_PATH_RE.match(href)
         if not m:
             continue
@@ -57,7 +165,7 @@ def fetch_index(session: requests.Session) -> list[dict]:
             {
                 "author_id": author_id,
                 "book_id": book_id,
-                "title": a.get_text(strip=True),
+                "title": link_text(a),
                 "work_url": BASE_URL + href,
             }
         )
@@ -65,6 +173,60 @@ def fetch_index(session: requests.Session) -> list[dict]:
     return works
 
 
+def _probe(session: requests.Session, url: str) -> bool:
+    """
+    Cheaply check whether *url* can be a ThML file before downloading it.
+
+    Uses HEAD; servers that reject HEAD get a ranged GET for the first 512
+    bytes instead. Only a missing resource or a declared body too small to be
+    a work rules the URL out.
+    """
+    resp = session.head(url, timeout=10, allow_redirects=True)
+    if resp.status_code in (405, 501):
+        with session.get(url, timeout=10, stream=True,
+                         headers={"Range": "bytes=0-511"}) as resp:
+            if resp.status_code not in (200, 206):
+                return False
+            # iter_content undoes any Content-Encoding; resp.raw would not
+            return b"<" in next(resp.iter_content(512), b"")[:200]
+    if resp.status_code != 200:
+        return False
+    length = resp.headers.get("Content-Length")
+    return not (length and length.isdigit() and int(length) <= 500)
+
+
+def _stream_to_file(resp: requests.Response, out_path: Path) -> bool:
+    """
+    Stream a response body to *out_path* if it looks like a ThML file.
+
+    The body is written to a sibling ``.part`` file in fixed-size chunks and
+    renamed into place only once complete, so an interrupted download never
+    leaves a truncated file that would later be treated as cached.
+    """
+    part = out_path.with_name(out_path.name + ".part")
+    try:
+        chunks = resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)
+        first = next(chunks, b"")
+        # Minimal sanity check: should look like XML
+        if b"<" not in first[:200].lstrip():
+            return False
+        parent = out_path.parent
+        if parent not in _DIRS_MADE:
+            parent.mkdir(parents=True, exist_ok=True)
+            _DIRS_MADE.add(parent)
+        with part.open("wb") as fh:
+            fh.write(first)
+            for chunk in chunks:
+                fh.write(chunk)
+            size = fh.tell()
+        if size <= 500:
+            return False
+        os.replace(part, out_path)
+        return True
+    finally:
+        part.unlink(missing_ok=True)
+
+
 def _try_download(session: requests.Session, urls: list[str], out_path: Path) -> str | None:
     """
     Try each URL in order; on HTTP 200 with XML-looking content, save and return
@@ -72,13 +234,10 @@ def _try_download(session: requests.Session, urls: list[str], out_path: Path) ->
     """
     for url in urls:
         try:
-            resp = session.get(url, timeout=60)
-            if resp.status_code == 200 and len(resp.content) > 500:
-                # Minimal sanity check: should look like XML
-                head = resp.content[:200].lstrip()
-                if b"<" in head:
-                    out_path.parent.mkdir(parents=True, exist_ok=True)
-                    out_path.write_bytes(resp.content)
+            if not _probe(session, url):
+                continue
+            with session.get(url, timeout=60, stream=True) as resp:
+                if resp.status_code == 200 and _stream_to_file(resp, out_path):
                     return url
         except requests.RequestException:
             continue
@@ -88,11 +247,11 @@ def _try_download(session: requests.Session, urls: list[str], out_path: Path) ->
 def download_work(
     work: dict,
     session: requests.Session,
-    delay: float,
+    pacer: RequestPacer,
     force: bool,
 ) -> dict:
     """
-    Attempt to download a ThML XML file for *work*.
+    Attempt to download a ThML XML file for *work*, waiting on *pacer* first.
     Returns an updated work dict with 'status' and 'local_path' keys.
     """
     author_id = work["author_id"]
@@ -102,7 +261,7 @@ def download_work(
     if not force and out_path.exists() and out_path.stat().st_size > 500:
         return {**work, "status": "cached", "local_path": str(out_path)}
 
-    time.sleep(delay)
+    pacer.wait()
 
     # Candidate URL patterns in preference order
     candidates = [
@@ -112,25 +271,64 @@ def download_work(
         f"{BASE_URL}/ccel/{author_id}/{book_id}/{book_id}.xml",
     ]
 
-    source_url = _try_download(session, candidates, out_path)
+    preferred = _AUTHOR_PATTERN_HITS.get(author_id)
+    if preferred:
+        ordered = [candidates[preferred]] + candidates[:preferred] + candidates[preferred + 1:]
+    else:
+        ordered = candidates
+
+    source_url = _try_download(session, ordered, out_path)
     if source_url:
+        _AUTHOR_PATTERN_HITS[author_id] = candidates.index(source_url)
         return {**work, "status": "downloaded", "local_path": str(out_path), "source_url": source_url}
     return {**work, "status": "failed", "local_path": None}
 
 
+def _loads(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
 def load_manifest() -> dict[str, dict]:
-    """Load existing manifest keyed by 'authorID/bookID'."""
-    if not MANIFEST_PATH.exists():
-        return {}
-    with open(MANIFEST_PATH, encoding="utf-8") as f:
-        entries = json.load(f)
+    """
+    Load the existing manifest keyed by 'authorID/bookID'.
+
+    Entries journalled by an unfinished run are applied on top of manifest.json.
+    """
+    entries: list[dict] = []
+    if MANIFEST_PATH.exists():
+        entries.extend(_loads(MANIFEST_PATH.read_bytes()))
+    if MANIFEST_JOURNAL_PATH.exists():
+        with MANIFEST_JOURNAL_PATH.open("rb") as fh:
+            for line in fh:
+                try:
+                    entries.append(_loads(line))
+                except ValueError:
+                    break  # torn final line from a crash
     return {f"{e['author_id']}/{e['book_id']}": e for e in entries}
 
 
+def append_manifest(entry: dict) -> None:
+    """Journal one result as a JSON line, so a crash loses at most that entry."""
+    if orjson is not None:
+        line = orjson.dumps(entry) + b"\n"
+    else:
+        line = json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n"
+    with MANIFEST_JOURNAL_PATH.open("ab") as fh:
+        fh.write(line)
+
+
 def save_manifest(results: list[dict]) -> None:
+    """Write the manifest via a temp file and rename, so a crash never leaves it half-written."""
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        data = orjson.dumps(results, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(results, indent=2, ensure_ascii=False).encode("utf-8")
+    tmp = MANIFEST_PATH.with_suffix(".json.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, MANIFEST_PATH)
+    # Everything journalled is now in manifest.json
+    MANIFEST_JOURNAL_PATH.unlink(missing_ok=True)
 
 
 def main() -> None:
@@ -141,17 +339,21 @@ def main() -> None:
                     help="Seconds to wait between HTTP requests (default: 0.5)")
     ap.add_argument("--force", action="store_true",
                     help="Re-download files that are already cached")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, metavar="N",
+                    help=f"Parallel downloads (default: {DEFAULT_WORKERS})")
+    ap.add_argument("--finalize", action="store_true",
+                    help="Fold manifest.jsonl into manifest.json without crawling")
     args = ap.parse_args()
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     cached_manifest = load_manifest()
 
-    session = requests.Session()
-    session.headers["User-Agent"] = (
-        "PatristicsResearchBot/1.0 (academic scripture citation research; "
-        "contact: see github.com/patristics)"
-    )
+    if args.finalize:
+        save_manifest(list(cached_manifest.values()))
+        print(f"Manifest written to {MANIFEST_PATH} ({len(cached_manifest)} entries)")
+        return
 
+    session = make_session(HEADERS)
     works = fetch_index(session)
     print(f"Found {len(works)} works in ThML index")
 
@@ -160,21 +362,28 @@ def main() -> None:
 
     results: list[dict] = []
     n = len(works)
+    # Shared by all workers, so --delay spaces requests across the whole crawl
+    pacer = RequestPacer(args.delay)
 
-    for i, work in enumerate(works, 1):
+    def fetch_one(work: dict) -> tuple[dict, bool]:
+        """Return (result, from_manifest) for one work; runs on a worker thread."""
         key = f"{work['author_id']}/{work['book_id']}"
         cached = cached_manifest.get(key)
-
         if not args.force and cached and cached.get("status") in ("downloaded", "cached"):
-            result = {**cached, "status": "cached"}
-            results.append(result)
-            print(f"  [{i:4d}/{n}] cached      {key}")
-            continue
+            return {**cached, "status": "cached"}, True
+        return download_work(work, thread_session(HEADERS), pacer, force=args.force), False
 
-        result = download_work(work, session, delay=args.delay, force=args.force)
-        results.append(result)
-        flag = "OK " if result["status"] == "downloaded" else "FAIL"
-        print(f"  [{i:4d}/{n}] {flag}         {key}")
+    # Results come back in index order, so progress and the manifest stay ordered
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for i, (result, from_manifest) in enumerate(pool.map(fetch_one, works), 1):
+            key = f"{result['author_id']}/{result['book_id']}"
+            results.append(result)
+            if from_manifest:
+                print(f"  [{i:4d}/{n}] cached      {key}")
+                continue
+            append_manifest(result)
+            flag = "OK " if result["status"] == "downloaded" else "FAIL"
+            print(f"  [{i:4d}/{n}] {flag}         {key}")
 
     save_manifest(results)
 
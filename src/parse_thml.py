@@ -13,11 +13,14 @@ Usage:
   python src/parse_thml.py ccel_thml/kempis/imit.xml   # single file
   python src/parse_thml.py --stats                 # show DB stats after parsing
   python src/parse_thml.py --dry-run               # print citations, no DB write
+  python src/parse_thml.py --workers 4             # parser processes (default: CPU count)
 """
 from __future__ import annotations
 
 import argparse
+import functools
 import json
+import os
 import re
 import sys
 from pathlib import Path
@@ -26,9 +29,10 @@ from lxml import etree
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from bible_data import BY_NAME, ABBREV_LOOKUP, BOOKS
-from db import get_connection, create_schema, delete_refs_for_manuscript, upsert_manuscript, DB_PATH
-from parser import extract_passage_offsets, _normalize_creator
+from bible_data import ABBREV_LOOKUP, BOOKS
+from db import (get_connection, create_schema, delete_refs_for_manuscript, upsert_manuscript,
+                RowBuffer, VERSE_REF_INSERT_SQL, DB_PATH)
+from parser import extract_passage_offsets, map_files, _normalize_creator, _NL_TO_SPACE
 
 PROJECT_ROOT = Path(__file__).parent.parent
 CCEL_THML_DIR = PROJECT_ROOT / "manuscripts" / "ccel_thml"
@@ -47,9 +51,6 @@ _SKIP_CONTENT_TAGS = frozenset({
     "milestone",
 })
 
-# Compiled once: matches numeric book prefix without a space, e.g. "1John" → "1 John"
-_NUM_PREFIX_RE = re.compile(r"^([1-4])([A-Za-z])")
-
 
 def _local(tag) -> str:
     """Strip XML namespace URI from a tag, returning just the local name.
@@ -82,89 +83,73 @@ for _b in BOOKS:
 for _k, _v in ABBREV_LOOKUP.items():
     _NAME_LOOKUP.setdefault(_k, _v)
 
+# Numeric prefixes written without a space ("1john", "2cor") resolve to the
+# spaced key, so register that form up front instead of rewriting on lookup.
+for _k, _v in list(_NAME_LOOKUP.items()):
+    if len(_k) > 2 and _k[0] in "1234" and _k[1] == " " and _k[2].isascii() and _k[2].isalpha():
+        _NAME_LOOKUP.setdefault(_k[0] + _k[2:], _v)
+
 
+@functools.lru_cache(maxsize=4096)
 def _resolve_book_name(name: str) -> dict | None:
     """
     Map a book name from a ThML 'parsed' attribute segment to a canonical book dict.
     Returns None if the name cannot be resolved.
     """
-    name = name.strip()
-    lower = name.lower()
-
-    if lower in _NAME_LOOKUP:
-        return _NAME_LOOKUP[lower]
-
-    # Handle "1John" → "1 john", "2Cor" → "2 cor", etc.
-    spaced = _NUM_PREFIX_RE.sub(r"\1 \2", lower)
-    if spaced != lower and spaced in _NAME_LOOKUP:
-        return _NAME_LOOKUP[spaced]
-
-    return None
+    return _NAME_LOOKUP.get(name.strip().lower())
 
 
 # ── ThML XML parsing ──────────────────────────────────────────────────────────
 
-def _load_xml(path: Path) -> etree._Element | None:
-    """
-    Parse a ThML file with lxml's recovery parser (handles missing DTD entities,
-    malformed markup, etc.).  Returns the root element, or None on failure.
-    """
-    parser = etree.XMLParser(recover=True, resolve_entities=False, no_network=True)
-    try:
-        tree = etree.parse(str(path), parser)
-        return tree.getroot()
-    except Exception as exc:
-        print(f"  [XML error] {path.name}: {exc}", file=sys.stderr)
-        return None
+# Metadata elements read by _extract_metadata, by local name
+_META_TAGS = frozenset({"DC.Title", "DC.Creator", "authorID", "bookID", "DC.Date"})
+
+_YEAR_RE = re.compile(r"\b(1\d{3}|[2-9]\d{2})\b")
 
 
-def _extract_metadata(root: etree._Element) -> dict:
+def _extract_metadata(fields: list[tuple[str, str, str]]) -> dict:
     """
-    Extract author, title, year, author_id, book_id from <ThML.head>.
+    Extract author, title, year, author_id, book_id from the (local_name, text,
+    sub attribute) of each metadata element found in the document.
     Returns a dict with those keys (values may be None if not found).
     """
     result = {"author": None, "title": None, "year": None, "author_id": None, "book_id": None}
 
-    def find_text(tag: str) -> str | None:
-        # Search anywhere in document for the given local tag name
-        for el in root.iter():
-            if _local(el.tag) == tag and el.text:
-                return el.text.strip()
-        return None
-
-    raw_title = find_text("DC.Title")
-    if raw_title:
-        result["title"] = raw_title
-
-    raw_creator = find_text("DC.Creator")
-    if raw_creator:
-        result["author"] = _normalize_creator(raw_creator)
-
-    result["author_id"] = find_text("authorID")
-    result["book_id"] = find_text("bookID")
-
-    # Year: prefer a DC.Date with sub="Published" or sub="Original";
-    # fall back to any DC.Date that contains a 4-digit year in the range 100–1999
-    for el in root.iter():
-        if _local(el.tag) != "DC.Date" or not el.text:
+    # First non-empty text per tag, searching anywhere in the document
+    first: dict[str, str] = {}
+    year_found = False
+    for tag, text, sub in fields:
+        if tag != "DC.Date":
+            first.setdefault(tag, text.strip())
+            continue
+        # Year: prefer a DC.Date with sub="Published" or sub="Original";
+        # fall back to any DC.Date that contains a 4-digit year in the range 100–1999
+        if year_found:
             continue
-        year_m = re.search(r"\b(1\d{3}|[2-9]\d{2})\b", el.text)
+        year_m = _YEAR_RE.search(text)
         if year_m:
             candidate = int(year_m.group(1))
-            sub = el.get("sub", "").lower()
-            if sub in ("published", "original", "written", "composed"):
+            if sub.lower() in ("published", "original", "written", "composed"):
                 result["year"] = candidate
-                break
-            if result["year"] is None:
+                year_found = True
+            elif result["year"] is None:
                 result["year"] = candidate
 
+    if first.get("DC.Title"):
+        result["title"] = first["DC.Title"]
+    if first.get("DC.Creator"):
+        result["author"] = _normalize_creator(first["DC.Creator"])
+    result["author_id"] = first.get("authorID")
+    result["book_id"] = first.get("bookID")
+
     return result
 
 
 class _TextBuilder:
     """
-    Walks an lxml element tree in document order, concatenating text nodes into
-    a clean string while recording the char offset of every <scripRef> element.
+    Streams a ThML file in document order, concatenating text nodes into a
+    clean string while recording the char offset of every <scripRef> element
+    and collecting the metadata fields.
 
     Elements in _SKIP_CONTENT_TAGS have their text/children suppressed; their
     .tail is still included (it belongs to the parent's prose flow).
@@ -173,35 +158,103 @@ class _TextBuilder:
     def __init__(self) -> None:
         self._parts: list[str] = []
         self._offset: int = 0
-        # list of (element, offset_at_start_of_scripRef_text)
-        self.scripref_hits: list[tuple[etree._Element, int]] = []
-
-    def _append(self, text: str) -> None:
-        if text:
-            self._parts.append(text)
-            self._offset += len(text)
-
-    def walk(self, el: etree._Element, in_skip: bool = False) -> None:
-        tag = _local(el.tag)
-        entering_skip = tag in _SKIP_CONTENT_TAGS
-        skip_content = in_skip or entering_skip
-
-        if not skip_content:
-            if tag == "scripRef":
-                self.scripref_hits.append((el, self._offset))
-            self._append(el.text)
-            for child in el:
-                self.walk(child, in_skip=False)
-        else:
-            # Still recurse into children so their tails (belonging to this
-            # skipped element) are also suppressed, but we must visit them to
-            # handle deeply-nested tails correctly.
-            for child in el:
-                self.walk(child, in_skip=True)
-
-        # Tail always belongs to the parent; include it unless the parent is skipped.
-        if not in_skip:
-            self._append(el.tail)
+        # list of (scripRef 'parsed' attribute, offset_at_start_of_scripRef_text)
+        self.scripref_hits: list[tuple[str | None, int]] = []
+        # (local_name, text, sub attribute) of every _META_TAGS element
+        self.meta_fields: list[tuple[str, str, str]] = []
+
+    def parse(self, path: Path) -> None:
+        """
+        Read *path* in one iterparse pass with lxml's recovery parser (handles
+        missing DTD entities, malformed markup, etc.), clearing each element
+        once it has been consumed so memory stays proportional to nesting
+        depth rather than document size. Raises etree.LxmlError on bad input.
+
+        An element's text (or tail) is only complete once the parser has moved
+        past it, so it is held as *pending* and appended at the next event.
+        Comment/PI/entity-reference text and tails are part of the clean text
+        as well.
+        """
+        parts_append = self._parts.append
+        hits_append = self.scripref_hits.append
+        meta_fields = self.meta_fields
+        # Slots in meta_fields reserved for open metadata elements: fields are
+        # listed in document (start-tag) order but read at their end tag, once
+        # the text is complete.
+        meta_open: list[int] = []
+        skip_tags, meta_tags = _SKIP_CONTENT_TAGS, _META_TAGS
+        offset = self._offset
+        # Whether each open element's content is skipped
+        skips: list[bool] = []
+        pending, pending_is_tail = None, False
+
+        events = etree.iterparse(
+            str(path), events=("start", "end", "comment", "pi"),
+            recover=True, resolve_entities=False, no_network=True,
+        )
+        for event, el in events:
+            if pending is not None:
+                if pending_is_tail:
+                    t, nxt = pending.tail, pending.getnext()
+                else:
+                    t, nxt = pending.text, (pending[0] if len(pending) else None)
+                if t:
+                    parts_append(t)
+                    offset += len(t)
+                # Unresolved entity references (&mdash; etc. without the DTD)
+                # are tree nodes that raise no events; their reference text
+                # and tail follow the pending text directly.
+                while isinstance(nxt, etree._Entity):
+                    for t in (nxt.text, nxt.tail):
+                        if t:
+                            parts_append(t)
+                            offset += len(t)
+                    nxt = nxt.getnext()
+                pending = None
+
+            if event == "start":
+                tag = _local(el.tag)
+                if tag in meta_tags:
+                    meta_open.append(len(meta_fields))
+                    meta_fields.append(None)
+                skip = (skips[-1] if skips else False) or tag in skip_tags
+                if not skip:
+                    if tag == "scripRef":
+                        hits_append((el.get("parsed"), offset))
+                    pending, pending_is_tail = el, False
+                skips.append(skip)
+
+            elif event == "end":
+                skips.pop()
+                tag = _local(el.tag)
+                if tag in meta_tags:
+                    meta_fields[meta_open.pop()] = (
+                        (tag, el.text, el.get("sub", "")) if el.text else None
+                    )
+                # Tail always belongs to the parent; include it unless the
+                # parent is skipped (or this is the root).
+                if skips and not skips[-1]:
+                    pending, pending_is_tail = el, True
+                el.clear(keep_tail=True)
+                # Drop already-consumed siblings so the tree never grows
+                parent = el.getparent()
+                if parent is not None:
+                    while el.getprevious() is not None:
+                        del parent[0]
+
+            elif skips and not skips[-1]:
+                # Comment or PI inside a non-skipped element
+                t = el.text
+                if t:
+                    parts_append(t)
+                    offset += len(t)
+                pending, pending_is_tail = el, True
+
+        self._offset = offset
+        meta_fields[:] = [f for f in meta_fields if f is not None]
+        if events.root is None:
+            # Recovery can swallow a non-XML file without raising
+            raise etree.XMLSyntaxError("no root element", None, 0, 0, str(path))
 
     @property
     def text(self) -> str:
@@ -259,25 +312,40 @@ def _parse_parsed_attr(parsed: str) -> list[dict]:
 
 # ── Per-file parsing ──────────────────────────────────────────────────────────
 
-def parse_thml_file(
-    xml_path: Path,
-    conn,
-    dry_run: bool = False,
-    verbose: bool = False,
-) -> int:
+def _write_if_changed(path: Path, data: bytes) -> bool:
     """
-    Parse one ThML XML file, extract citations, and insert into the DB.
-    Saves a clean .txt companion file alongside the .xml.
-    Returns the number of citation rows inserted.
+    Write *data* to *path* unless the file already holds exactly those bytes.
+    A size mismatch settles it without reading the old file. Returns True if
+    the file was written.
     """
-    root = _load_xml(xml_path)
-    if root is None:
-        return 0
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
 
-    meta = _extract_metadata(root)
-    author = meta["author"]
-    title = meta["title"]
-    year = meta["year"]
+
+def scan_thml_file(xml_path: Path, dry_run: bool = False, previews: bool = False) -> dict:
+    """
+    The DB-free half of parse_thml_file: parse *xml_path*, save the clean .txt
+    companion alongside it (unless *dry_run*) and decode its citations. Safe to
+    run in a worker process.
+
+    Returns a dict with the manuscript fields, the verse_refs rows (without
+    manuscript_id) and, with *previews*, one printable line per citation. If
+    the XML can't be read only "xml_path" and "error" are set.
+    """
+    # Build clean text, collect scripRef offsets and metadata in one pass
+    builder = _TextBuilder()
+    try:
+        builder.parse(xml_path)
+    except (etree.LxmlError, OSError) as exc:
+        return {"xml_path": xml_path, "error": str(exc)}
+
+    meta = _extract_metadata(builder.meta_fields)
     author_id = meta["author_id"]
     book_id = meta["book_id"]
 
@@ -292,41 +360,18 @@ def parse_thml_file(
     txt_path = xml_path.with_suffix(".txt")
     rel_filename = str(txt_path.relative_to(PROJECT_ROOT)).replace("\\", "/")
 
-    print(f"\nParsing: {xml_path.relative_to(PROJECT_ROOT)}")
-    if author or title:
-        print(f"  {author or '?'}  |  {title or '?'}")
-
-    # Build clean text and collect scripRef offsets
-    builder = _TextBuilder()
-    builder.walk(root)
     clean_text = builder.text
 
     # Save clean text file (builder uses this via stored offsets)
     if not dry_run:
-        txt_path.write_text(clean_text, encoding="utf-8")
-
-    if not dry_run:
-        # Conflict resolution: if a txt-sourced row exists for this ccel_url,
-        # delete it so the ThML version takes priority.
-        existing = conn.execute(
-            "SELECT id, source_format FROM manuscripts WHERE ccel_url = ?", (ccel_url,)
-        ).fetchone()
-        if existing and existing["source_format"] == "txt":
-            delete_refs_for_manuscript(conn, existing["id"])
-            conn.execute("DELETE FROM manuscripts WHERE id = ?", (existing["id"],))
-
-        manuscript_id = upsert_manuscript(
-            conn, rel_filename,
-            author=author, title=title, year=year,
-            ccel_url=ccel_url, category="Other",
-            source_format="thml",
-        )
-        delete_refs_for_manuscript(conn, manuscript_id)
+        _write_if_changed(txt_path, clean_text.encode("utf-8"))
 
     rows: list[tuple] = []
+    rows_append = rows.append
+    lines: list[str] = []
+    sentence_cache: dict[tuple[int, int], tuple] = {}
 
-    for el, cite_offset in builder.scripref_hits:
-        parsed_attr = el.get("parsed")
+    for parsed_attr, cite_offset in builder.scripref_hits:
         if not parsed_attr:
             continue  # only process structurally-tagged citations
 
@@ -334,23 +379,23 @@ def parse_thml_file(
         if not citations:
             continue
 
-        passage_start, passage_end = extract_passage_offsets(clean_text, cite_offset)
+        passage_start, passage_end = extract_passage_offsets(clean_text, cite_offset, sentence_cache)
 
         for cit in citations:
             be = cit["book_entry"]
-            if verbose or dry_run:
-                ref_str = f"{be['name']} {cit['chapter']}"
+            be_name, be_slug = be["name"], be["slug"]
+            if previews:
+                ref_str = f"{be_name} {cit['chapter']}"
                 if cit["verse_start"]:
                     ref_str += f":{cit['verse_start']}"
                     if cit["verse_end"]:
                         ref_str += f"-{cit['verse_end']}"
-                preview = clean_text[passage_start:passage_start + 80].replace("\n", " ")
-                print(f"  {ref_str:30s}  …{preview}…")
+                preview = clean_text[passage_start:passage_start + 80].translate(_NL_TO_SPACE)
+                lines.append(f"  {ref_str:30s}  …{preview}…")
 
-            rows.append((
-                manuscript_id if not dry_run else 0,
-                be["name"],
-                be["slug"],
+            rows_append((
+                be_name,
+                be_slug,
                 cit["chapter"],
                 cit["verse_start"],
                 cit["verse_end"],
@@ -359,21 +404,86 @@ def parse_thml_file(
                 passage_end,
             ))
 
-    if not dry_run and rows:
-        conn.executemany(
-            """INSERT INTO verse_refs
-               (manuscript_id, book, book_slug, chapter,
-                verse_start, verse_end,
-                citation_offset, passage_start_offset, passage_end_offset)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            rows,
+    return {
+        "xml_path": xml_path, "error": None,
+        "author": meta["author"], "title": meta["title"], "year": meta["year"],
+        "ccel_url": ccel_url, "rel_filename": rel_filename,
+        "rows": rows, "previews": lines,
+    }
+
+
+def store_thml_scan(
+    scan: dict,
+    conn,
+    dry_run: bool = False,
+    rows_out: RowBuffer | None = None,
+) -> int:
+    """
+    The DB half of parse_thml_file: record a scan_thml_file result.
+    Returns the number of citation rows inserted.
+    Does not commit; the caller owns the transaction. With *rows_out*, rows
+    are queued there instead of inserted immediately.
+    """
+    xml_path = scan["xml_path"]
+    if scan["error"] is not None:
+        print(f"  [XML error] {xml_path.name}: {scan['error']}", file=sys.stderr)
+        return 0
+
+    author, title, ccel_url = scan["author"], scan["title"], scan["ccel_url"]
+    print(f"\nParsing: {xml_path.relative_to(PROJECT_ROOT)}")
+    if author or title:
+        print(f"  {author or '?'}  |  {title or '?'}")
+    for line in scan["previews"]:
+        print(line)
+
+    rows = scan["rows"]
+    if not dry_run:
+        # Conflict resolution: if a txt-sourced row exists for this ccel_url,
+        # delete it so the ThML version takes priority.
+        existing = conn.execute(
+            "SELECT id, source_format FROM manuscripts WHERE ccel_url = ?", (ccel_url,)
+        ).fetchone()
+        if existing and existing["source_format"] == "txt":
+            delete_refs_for_manuscript(conn, existing["id"])
+            conn.execute("DELETE FROM manuscripts WHERE id = ?", (existing["id"],))
+
+        manuscript_id = upsert_manuscript(
+            conn, scan["rel_filename"],
+            author=author, title=title, year=scan["year"],
+            ccel_url=ccel_url, category="Other",
+            source_format="thml",
         )
-        conn.commit()
+        delete_refs_for_manuscript(conn, manuscript_id)
+
+        if rows:
+            rows = [(manuscript_id, *row) for row in rows]
+            if rows_out is not None:
+                rows_out.extend(rows)
+            else:
+                conn.executemany(VERSE_REF_INSERT_SQL, rows)
 
     print(f"  -> {len(rows)} citation rows")
     return len(rows)
 
 
+def parse_thml_file(
+    xml_path: Path,
+    conn,
+    dry_run: bool = False,
+    verbose: bool = False,
+    rows_out: RowBuffer | None = None,
+) -> int:
+    """
+    Parse one ThML XML file, extract citations, and insert into the DB.
+    Saves a clean .txt companion file alongside the .xml.
+    Returns the number of citation rows inserted.
+    Does not commit; the caller owns the transaction. With *rows_out*, rows
+    are queued there instead of inserted immediately.
+    """
+    scan = scan_thml_file(xml_path, dry_run=dry_run, previews=verbose or dry_run)
+    return store_thml_scan(scan, conn, dry_run=dry_run, rows_out=rows_out)
+
+
 # ── Entry point ───────────────────────────────────────────────────────────────
 
 def _paths_from_manifest() -> list[Path]:
@@ -420,6 +530,8 @@ def main() -> None:
                     help="Print each citation found")
     ap.add_argument("--stats", action="store_true",
                     help="Show DB stats after parsing")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, metavar="N",
+                    help="Parallel parser processes (default: CPU count)")
     args = ap.parse_args()
 
     create_schema()
@@ -430,12 +542,38 @@ def main() -> None:
     else:
         paths = _paths_from_manifest()
 
-    total = 0
+    # A file listed twice is parsed once; queued rows from the first pass
+    # would otherwise survive the second pass's delete.
+    paths = list({p.resolve(): p for p in paths}.values())
+
+    # One transaction for the whole run: the caller commits, not each file,
+    # so a batch of manuscripts costs one fsync instead of one per file.
+    # Rows from all files are inserted together in large executemany chunks.
+    # Files are parsed in parallel worker processes; results come back in
+    # order and are written here on the one connection.
     for path in paths:
         if not path.exists():
             print(f"File not found: {path}", file=sys.stderr)
-            continue
-        total += parse_thml_file(path, conn, dry_run=args.dry_run, verbose=args.verbose)
+    paths = [p for p in paths if p.exists()]
+    scan = functools.partial(scan_thml_file, dry_run=args.dry_run,
+                             previews=args.verbose or args.dry_run)
+
+    total = 0
+    rows_out = RowBuffer(conn, VERSE_REF_INSERT_SQL)
+    if not args.dry_run:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        for result in map_files(scan, paths, args.workers):
+            total += store_thml_scan(result, conn, dry_run=args.dry_run, rows_out=rows_out)
+        rows_out.flush()
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    # Let SQLite re-analyze whatever this run changed enough to matter
+    if not args.dry_run:
+        conn.execute("PRAGMA optimize")
 
     print(f"\nTotal citation rows: {total}")
 
@@ -8,23 +8,31 @@ Usage:
   python src/parser.py --dry-run manuscripts/mort.txt  # print matches, no DB write
   python src/parser.py --stats                  # show DB stats after parsing
   python src/parser.py --include-thml           # also parse works that have a ThML version
+  python src/parser.py --workers 4              # parser processes (default: CPU count)
 
 The parser is idempotent: re-running a file first deletes its existing rows.
 By default any manuscript whose ccel_url is already sourced from ThML is skipped
 (parse_thml.py is the preferred source for those works).
+
+Optional: pip install pyahocorasick  (one-pass citation prefilter; the regex scans the whole text otherwise)
 """
 from __future__ import annotations
 
 import argparse
+import bisect
+import functools
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Allow running from project root or src/
 sys.path.insert(0, str(Path(__file__).parent))
 
 from bible_data import ABBREV_LOOKUP, ABBREV_LIST, roman_to_int, is_roman, BOOKS
-from db import get_connection, create_schema, upsert_manuscript, delete_refs_for_manuscript, DB_PATH
+from db import (get_connection, create_schema, upsert_manuscript, delete_refs_for_manuscript,
+                RowBuffer, VERSE_REF_INSERT_SQL, DB_PATH)
 
 MANUSCRIPTS_DIR = Path(__file__).parent.parent / "manuscripts"
 
@@ -145,29 +153,35 @@ _SENT_SPLIT_RE = re.compile(
 )
 
 
+# Last word before a chunk's closing punctuation (potential abbreviation)
+_LAST_WORD_RE = re.compile(r'(\w+)\s*[.!?]["\'\)]*$')
+
+
 def split_sentences(text: str) -> list[str]:
     """Split text into sentences using a simple heuristic."""
-    # Use findall to get the split points, then reconstruct
+    # Use split to get the split points, then reconstruct
     parts = _SENT_SPLIT_RE.split(text)
     # parts alternates: [text, punct, text, punct, ...]
     sentences: list[str] = []
-    buf = ""
-    i = 0
-    while i < len(parts):
+    pending: list[str] = []  # pieces of the sentence being built
+    for i in range(0, len(parts), 2):
         chunk = parts[i]
         punct = parts[i + 1] if i + 1 < len(parts) else ""
-        buf += chunk + punct
-        i += 2
+        pending.append(chunk + punct)
+        if not punct:
+            continue
 
-        # Decide whether to break here
-        # Check the last word before the punctuation (potential abbreviation)
-        last_word_m = re.search(r'(\w+)\s*[.!?]["\'\)]*$', buf.rstrip())
+        # Decide whether to break here. Only this chunk needs checking: a
+        # carried-over sentence always ends in punctuation, so the last word
+        # can't run back into it.
+        last_word_m = _LAST_WORD_RE.search((chunk + punct).rstrip())
         last_word = last_word_m.group(1).lower() if last_word_m else ""
 
-        if punct and last_word not in _ABBREV_ENDINGS:
-            sentences.append(buf.strip())
-            buf = ""
+        if last_word not in _ABBREV_ENDINGS:
+            sentences.append("".join(pending).strip())
+            pending = []
 
+    buf = "".join(pending)
     if buf.strip():
         sentences.append(buf.strip())
 
@@ -186,6 +200,37 @@ def split_sentences(text: str) -> list[str]:
 
 # ── Citation regex ────────────────────────────────────────────────────────────
 
+def _trie_pattern(words: list[str]) -> str:
+    """
+    Build a regex alternation equivalent to '|'.join(words) (longest first),
+    factored as a prefix trie so e.g. rom|roma|romans becomes rom(?:a(?:ns)?)?.
+    The engine then follows one branch per character instead of trying every
+    alternative at every position. Words must be lowercase; the result is meant
+    for an IGNORECASE pattern.
+    """
+    end = ""  # key marking a complete word; never a real character
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[end] = None
+
+    def emit(node: dict) -> str:
+        # Longer matches are tried first: children, then ending here
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch != end]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if end in node:
+            if len(alts) == 1:
+                body = "(?:" + body + ")"
+            return body + "?"
+        return body
+
+    return "(?:" + emit(trie) + ")"
+
+
 def _build_citation_re() -> re.Pattern:
     """
     Build a compiled regex that matches Bible citations in a variety of formats:
@@ -198,8 +243,6 @@ def _build_citation_re() -> re.Pattern:
       Rom. viii. 13-17       - verse range
       Gal. v. 16, 17         - multiple verses (handled post-match)
     """
-    # Escape abbrevs for regex, sorted longest-first for greedy matching
-    escaped = [re.escape(a) for a in ABBREV_LIST]
 
     # Book pattern: word boundary, optional "Saint" prefix, then abbreviation.
     # End with optional dot; require the next char to NOT be a word char
@@ -207,8 +250,8 @@ def _build_citation_re() -> re.Pattern:
     book_pat = (
         r'\b'
         r'(?:(?:Saint|St\.?)\s+)?'   # optional St / Saint prefix
-        r'(?:' + '|'.join(escaped) + r')'
-        r'\.?'                         # optional trailing dot
+        + _trie_pattern(ABBREV_LIST)  # any abbreviation, longest match first
+        + r'\.?'                       # optional trailing dot
         r'(?=\W|$)'                    # must end at a non-word char (or EOL)
     )
 
@@ -233,6 +276,58 @@ def _build_citation_re() -> re.Pattern:
 
 CITATION_RE = _build_citation_re()
 
+# ── Candidate prefilter ───────────────────────────────────────────────────────
+# Every CITATION_RE match starts with a book abbreviation or a St/Saint prefix,
+# so with pyahocorasick those literals are located in one C-level pass and the
+# regex is only tried at the offsets they start at.
+
+# Case folding that matches re.IGNORECASE for the ASCII abbreviations while
+# keeping every offset unchanged (str.lower() can lengthen some characters).
+_FOLD_TABLE = {**{c: c + 32 for c in range(ord("A"), ord("Z") + 1)},
+               0x130: "i", 0x131: "i", 0x17F: "s", 0x212A: "k"}
+
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def _build_candidate_automaton():
+    automaton = ahocorasick.Automaton()
+    for word in (*ABBREV_LIST, "st", "saint"):
+        automaton.add_word(word, len(word))
+    automaton.make_automaton()
+    return automaton
+
+
+if ahocorasick is not None:
+    _CANDIDATE_AUTOMATON = _build_candidate_automaton()
+
+
+def iter_citations(text: str):
+    """
+    Yield the same matches as CITATION_RE.finditer(text), trying the regex
+    only at offsets where an abbreviation or St/Saint begins. Falls back to a
+    plain finditer when pyahocorasick is not installed.
+    """
+    if ahocorasick is None:
+        yield from CITATION_RE.finditer(text)
+        return
+    folded = text.translate(_FOLD_TABLE)
+    starts = sorted({end - n + 1 for end, n in _CANDIDATE_AUTOMATON.iter(folded)})
+    match = CITATION_RE.match
+    pos = 0
+    for start in starts:
+        if start < pos:
+            continue  # inside the previous match
+        if start and (text[start - 1].isalnum() or text[start - 1] == "_"):
+            continue  # mid-word, so the pattern's leading \b can't match
+        m = match(text, start)
+        if m:
+            yield m
+            pos = m.end()
+
 # Verse list split (handles "13, 14" or "13-15" after a match)
 _VERSE_LIST_RE = re.compile(r'\d+')
 
@@ -253,6 +348,13 @@ def _parse_verse_field(verse_str: str | None) -> tuple[int | None, int | None]:
     return first, (last if last != first else None)
 
 
+_SAINT_PREFIX_RE = re.compile(r'\bst(?:\.?\s+|aint\s+)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+# The same few hundred book spellings recur thousands of times per manuscript,
+# so each distinct raw string is normalised and looked up only once.
+@functools.lru_cache(maxsize=4096)
 def _resolve_book(raw: str) -> dict | None:
     """
     Resolve a raw book string (with possible dots, 'St', etc.) to a canonical book dict.
@@ -260,9 +362,9 @@ def _resolve_book(raw: str) -> dict | None:
     """
     # Normalise: remove dots, collapse spaces, strip 'St.'/'Saint' prefix, lowercase
     s = raw.lower()
-    s = re.sub(r'\bst(?:\.?\s+|aint\s+)', '', s)  # remove St/Saint prefix
-    s = re.sub(r'\.', '', s)                        # remove dots
-    s = re.sub(r'\s+', ' ', s).strip()              # normalise whitespace
+    s = _SAINT_PREFIX_RE.sub('', s)           # remove St/Saint prefix
+    s = s.replace('.', '')                    # remove dots
+    s = _WHITESPACE_RE.sub(' ', s).strip()    # normalise whitespace
 
     # Direct lookup
     if s in ABBREV_LOOKUP:
@@ -278,23 +380,40 @@ def _resolve_book(raw: str) -> dict | None:
 
 # ── Passage window extraction ─────────────────────────────────────────────────
 
+# Blank-line boundary: two or more newlines (possibly with spaces between)
+_BLANK_LINE_RE = re.compile(r'\n[ \t]*\n')
+# Every position at which a blank-line boundary can begin
+_BLANK_LINE_START_RE = re.compile(r'\n(?=[ \t]*\n)')
+
+
+@functools.lru_cache(maxsize=1)
+def _paragraph_breaks(text: str) -> tuple[list[int], list[int]]:
+    """
+    Scan *text* once for paragraph boundaries, returning (ends, starts): the
+    end offsets of the blank-line matches a left-to-right scan finds, and
+    every offset where a blank line could start. Cached for the file being
+    parsed, since every citation in it needs the same lists.
+    """
+    ends = [m.end() for m in _BLANK_LINE_RE.finditer(text)]
+    starts = [m.start() for m in _BLANK_LINE_START_RE.finditer(text)]
+    return ends, starts
+
+
 def _find_paragraph_bounds(text: str, char_offset: int) -> tuple[int, int]:
     """
     Given a char_offset within text, find the start and end of the paragraph
     (delimited by blank lines, i.e. two or more consecutive newlines).
     Returns (para_start, para_end) as character offsets.
     """
-    # Blank-line boundary: two or more newlines (possibly with spaces between)
-    blank_line = re.compile(r'\n[ \t]*\n')
+    ends, starts = _paragraph_breaks(text)
 
-    # Find last blank line before offset
-    para_start = 0
-    for m in blank_line.finditer(text, 0, char_offset):
-        para_start = m.end()
+    # End of the last blank line before offset
+    i = bisect.bisect_right(ends, char_offset)
+    para_start = ends[i - 1] if i else 0
 
-    # Find next blank line after offset
-    m = blank_line.search(text, char_offset)
-    para_end = m.start() if m else len(text)
+    # Start of the next blank line after offset
+    j = bisect.bisect_left(starts, char_offset)
+    para_end = starts[j] if j < len(starts) else len(text)
 
     return para_start, para_end
 
@@ -302,31 +421,59 @@ def _find_paragraph_bounds(text: str, char_offset: int) -> tuple[int, int]:
 MAX_SENTENCES = 10
 
 
-def extract_passage_offsets(text: str, citation_offset: int) -> tuple[int, int]:
+def _paragraph_sentences(text: str, para_start: int, para_end: int) -> tuple[str, list[str], list[int]]:
+    """
+    Split the paragraph text[para_start:para_end] into sentences and locate
+    each one in it, returning (para_text, sentences, sentence_starts).
+
+    Sentences that split_sentences rejoined across a line break aren't found
+    verbatim; they're placed at the end of the previous one.
+    """
+    para_text = text[para_start:para_end]
+    sentences = split_sentences(para_text)
+    starts: list[int] = []
+    cursor = 0
+    for sent in sentences:
+        pos = para_text.find(sent, cursor)
+        if pos == -1:
+            pos = cursor
+        starts.append(pos)
+        cursor = pos + len(sent)
+    return para_text, sentences, starts
+
+
+def extract_passage_offsets(
+    text: str,
+    citation_offset: int,
+    sentence_cache: dict[tuple[int, int], tuple] | None = None,
+) -> tuple[int, int]:
     """
     Find the passage window (up to MAX_SENTENCES sentences) surrounding
     citation_offset. Returns (passage_start_offset, passage_end_offset).
+
+    Citations cluster, so a caller scanning one text can pass the same
+    *sentence_cache* dict for every citation in it; each paragraph is then
+    split into sentences only once.
     """
     para_start, para_end = _find_paragraph_bounds(text, citation_offset)
-    para_text = text[para_start:para_end]
-
-    sentences = split_sentences(para_text)
+    if sentence_cache is None:
+        sentence_cache = {}
+    key = (para_start, para_end)
+    split = sentence_cache.get(key)
+    if split is None:
+        split = sentence_cache[key] = _paragraph_sentences(text, para_start, para_end)
+    para_text, sentences, sent_starts = split
 
     if len(sentences) <= MAX_SENTENCES:
         return para_start, para_end
 
-    # Find which sentence contains the citation
+    # Find which sentence contains the citation. Sentence spans are ascending
+    # and disjoint, so only the last one starting at or before it can.
     cite_rel = citation_offset - para_start
-    cursor = 0
     cite_sent_idx = 0
-    for i, sent in enumerate(sentences):
-        # Find this sentence's position in para_text
-        pos = para_text.find(sent, cursor)
-        if pos == -1:
-            pos = cursor
-        if pos <= cite_rel <= pos + len(sent):
-            cite_sent_idx = i
-        cursor = pos + len(sent)
+    i = bisect.bisect_right(sent_starts, cite_rel) - 1
+    if i >= 0 and cite_rel <= sent_starts[i] + len(sentences[i]):
+        cite_sent_idx = i
 
     # Take a window of MAX_SENTENCES centred on cite_sent_idx
     half = MAX_SENTENCES // 2
@@ -418,16 +565,18 @@ def _thml_url_exists(conn, ccel_url: str | None) -> bool:
     return row is not None
 
 
-def parse_file(
-    path: Path,
-    conn,
-    dry_run: bool = False,
-    verbose: bool = False,
-    skip_thml: bool = True,
-) -> int:
+# Flattens a passage preview onto one console line
+_NL_TO_SPACE = str.maketrans("\n", " ")
+
+
+def scan_file(path: Path, previews: bool = False) -> dict:
     """
-    Parse a manuscript file, extract citations, and insert rows into verse_refs.
-    Returns the number of citations found.
+    The DB-free half of parse_file: read *path* and work out its metadata and
+    citations. Safe to run in a worker process.
+
+    Returns a dict with filename, author, title, year, ccel_url, the verse_refs
+    rows (without manuscript_id) and, with *previews*, one printable line per
+    citation.
     """
     filename = path.name
     text = path.read_text(encoding="utf-8", errors="replace")
@@ -447,22 +596,12 @@ def parse_file(
         else:
             ccel_url = None
 
-    if skip_thml and not dry_run and _thml_url_exists(conn, ccel_url):
-        print(f"\nSkipping: {filename}  (ThML version already in DB: {ccel_url})")
-        return 0
+    rows: list[tuple] = []
+    rows_append = rows.append
+    lines: list[str] = []
+    sentence_cache: dict[tuple[int, int], tuple] = {}
 
-    print(f"\nParsing: {filename}")
-    if author:
-        print(f"  Author: {author}  |  Title: {title}")
-
-    if not dry_run:
-        manuscript_id = upsert_manuscript(conn, filename, author, title, year, ccel_url)
-        delete_refs_for_manuscript(conn, manuscript_id)
-
-    count = 0
-    rows = []
-
-    for m in CITATION_RE.finditer(text):
+    for m in iter_citations(text):
         raw_book = m.group("book")
         raw_chapter = m.group("chapter")
         raw_verse = m.group("verse")
@@ -500,20 +639,18 @@ def parse_file(
             anchor = inline_offset if inline_offset is not None else citation_offset
         else:
             anchor = citation_offset
-        passage_start, passage_end = extract_passage_offsets(text, anchor)
+        passage_start, passage_end = extract_passage_offsets(text, anchor, sentence_cache)
 
-        if verbose or dry_run:
+        if previews:
             ref_str = f"{book['name']} {chapter}"
             if verse_start:
                 ref_str += f":{verse_start}"
                 if verse_end:
                     ref_str += f"-{verse_end}"
-            passage_preview = text[passage_start:passage_start + 80].replace("\n", " ")
-            print(f"  {ref_str:30s}  …{passage_preview}…")
+            passage_preview = text[passage_start:passage_start + 80].translate(_NL_TO_SPACE)
+            lines.append(f"  {ref_str:30s}  …{passage_preview}…")
 
-        count += 1
-        rows.append((
-            manuscript_id if not dry_run else 0,
+        rows_append((
             book["name"],
             book["slug"],
             chapter,
@@ -524,19 +661,81 @@ def parse_file(
             passage_end,
         ))
 
-    if not dry_run and rows:
-        conn.executemany(
-            """INSERT INTO verse_refs
-               (manuscript_id, book, book_slug, chapter,
-                verse_start, verse_end,
-                citation_offset, passage_start_offset, passage_end_offset)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            rows,
-        )
-        conn.commit()
+    return {
+        "filename": filename, "author": author, "title": title, "year": year,
+        "ccel_url": ccel_url, "rows": rows, "previews": lines,
+    }
 
-    print(f"  -> {count} citations found")
-    return count
+
+def store_scan(
+    scan: dict,
+    conn,
+    dry_run: bool = False,
+    skip_thml: bool = True,
+    rows_out: RowBuffer | None = None,
+) -> int:
+    """
+    The DB half of parse_file: record a scan_file result in the database.
+    Returns the number of citations found.
+    Does not commit; the caller owns the transaction. With *rows_out*, rows
+    are queued there instead of inserted immediately.
+    """
+    filename, author, ccel_url = scan["filename"], scan["author"], scan["ccel_url"]
+
+    if skip_thml and not dry_run and _thml_url_exists(conn, ccel_url):
+        print(f"\nSkipping: {filename}  (ThML version already in DB: {ccel_url})")
+        return 0
+
+    print(f"\nParsing: {filename}")
+    if author:
+        print(f"  Author: {author}  |  Title: {scan['title']}")
+    for line in scan["previews"]:
+        print(line)
+
+    rows = scan["rows"]
+    if not dry_run:
+        manuscript_id = upsert_manuscript(conn, filename, author, scan["title"], scan["year"], ccel_url)
+        delete_refs_for_manuscript(conn, manuscript_id)
+        if rows:
+            rows = [(manuscript_id, *row) for row in rows]
+            if rows_out is not None:
+                rows_out.extend(rows)
+            else:
+                conn.executemany(VERSE_REF_INSERT_SQL, rows)
+
+    print(f"  -> {len(rows)} citations found")
+    return len(rows)
+
+
+def parse_file(
+    path: Path,
+    conn,
+    dry_run: bool = False,
+    verbose: bool = False,
+    skip_thml: bool = True,
+    rows_out: RowBuffer | None = None,
+) -> int:
+    """
+    Parse a manuscript file, extract citations, and insert rows into verse_refs.
+    Returns the number of citations found.
+    Does not commit; the caller owns the transaction. With *rows_out*, rows
+    are queued there instead of inserted immediately.
+    """
+    scan = scan_file(path, previews=verbose or dry_run)
+    return store_scan(scan, conn, dry_run=dry_run, skip_thml=skip_thml, rows_out=rows_out)
+
+
+def map_files(fn, paths: list[Path], workers: int):
+    """
+    Yield fn(path) for each path, in order. With more than one worker the calls
+    run in a process pool, so CPU-bound parsing uses every core while the caller
+    keeps all database writes on its own connection. *fn* must be picklable.
+    """
+    if workers <= 1 or len(paths) <= 1:
+        yield from map(fn, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(fn, paths, chunksize=4)
 
 
 def show_stats(conn) -> None:
@@ -565,6 +764,8 @@ def main() -> None:
     ap.add_argument("--stats", action="store_true", help="Show DB stats after parsing")
     ap.add_argument("--include-thml", action="store_true",
                     help="Parse works even if a ThML version already exists in the DB")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, metavar="N",
+                    help="Parallel parser processes (default: CPU count)")
     args = ap.parse_args()
 
     create_schema()
@@ -579,13 +780,40 @@ def main() -> None:
 
     skip_thml = not args.include_thml
 
-    total = 0
+    # Manuscripts are keyed by bare filename, so a name given twice is parsed
+    # once (the last path wins); queued rows for it would otherwise survive
+    # the second parse's delete.
+    paths = list({p.name: p for p in paths}.values())
+
+    # One transaction for the whole run: the caller commits, not each file,
+    # so a batch of manuscripts costs one fsync instead of one per file.
+    # Rows from all files are inserted together in large executemany chunks.
+    # Files are scanned in parallel worker processes; results come back in
+    # order and are written here on the one connection.
     for path in paths:
         if not path.exists():
             print(f"File not found: {path}", file=sys.stderr)
-            continue
-        total += parse_file(path, conn, dry_run=args.dry_run, verbose=args.verbose,
-                            skip_thml=skip_thml)
+    paths = [p for p in paths if p.exists()]
+    scan = functools.partial(scan_file, previews=args.verbose or args.dry_run)
+
+    total = 0
+    rows_out = RowBuffer(conn, VERSE_REF_INSERT_SQL)
+    if not args.dry_run:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        for result in map_files(scan, paths, args.workers):
+            total += store_scan(result, conn, dry_run=args.dry_run, skip_thml=skip_thml,
+                                rows_out=rows_out)
+        rows_out.flush()
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    # Refresh planner statistics now that the rows are in, rather than at
+    # schema time when they are about to go stale
+    if not args.dry_run:
+        conn.execute("PRAGMA optimize")
 
     print(f"\nTotal citations across all files: {total}")
 
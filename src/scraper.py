@@ -4,21 +4,65 @@ CCEL scraper: downloads works as plain text from ccel.org.
 Usage:
   python src/scraper.py               # download all works from the CCEL txt index
   python src/scraper.py --list        # print works list without downloading
+  python src/scraper.py --workers 4   # number of parallel downloads
+  python src/scraper.py --refresh     # re-check downloaded works, fetching only changed ones
+  python src/scraper.py --probe       # HEAD-check .txt URLs first, skipping works CCEL lacks
+  python src/scraper.py --refresh-index  # ignore the cached work list and fetch the index again
 
 Works are discovered dynamically from https://www.ccel.org/index/format/txt.
 Files are saved to manuscripts/{filename}.
-Already-downloaded files are always skipped, so the run can be safely resumed.
+Already-downloaded files are skipped, so the run can be safely resumed; a
+download cut off midway picks up from its .part file with a Range request. The
+ETag / Last-Modified each file was served with is kept in manuscripts/.index.json;
+--refresh sends them back as a conditional GET, so unchanged works cost no body.
+The parsed work list is cached in manuscripts/.cache/ for a day and then
+revalidated the same way.
+
+Optional: pip install tqdm  (byte progress bar while downloading in a terminal)
 """
 import argparse
+import html.parser
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
 import sys
+import threading
 import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+# Allow running from project root or src/
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ccel_http import DOWNLOAD_CHUNK_SIZE, INDEX_CACHE_TTL, link_text, make_session, thread_session
 
 MANUSCRIPTS_DIR = Path(__file__).parent.parent / "manuscripts"
 
+# Work page links in the index: /ccel/{author_slug}/{work_slug}.html
+_WORK_HREF_RE = re.compile(r"/ccel/([^/]+)/([^/]*)\.html")
+
+# filename -> {"etag", "last_modified", "size"} as served when last downloaded
+VALIDATORS_PATH = MANUSCRIPTS_DIR / ".index.json"
+
+# The work list parsed from the index page, plus the validators the page was
+# served with. The .txt links discover_txt_url finds on work pages are kept
+# alongside, keyed by page URL.
+CACHE_DIR = MANUSCRIPTS_DIR / ".cache"
+INDEX_CACHE_PATH = CACHE_DIR / "index.json"
+TXT_LINKS_PATH = CACHE_DIR / "txt_links.json"
+
 CCEL_INDEX_URL = "https://www.ccel.org/index/format/txt"
 
 # Local-only works that exist in manuscripts/ but are not available on CCEL.
@@ -54,149 +98,518 @@ HEADERS = {
         "Mozilla/5.0 (compatible; PatristicsBot/1.0; "
         "+https://github.com/patristics-viewer) "
         "Gecko/20100101 Firefox/120.0"
-    )
+    ),
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
 }
-REQUEST_DELAY = 2.0  # seconds between requests
 
+# Page-cache hints for downloaded files (Linux and some other POSIX systems)
+HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+# CCEL request budget shared by all workers: a steady REQUEST_RATE per second,
+# with up to REQUEST_BURST requests allowed back to back after a quiet spell.
+REQUEST_RATE = 0.5
+REQUEST_BURST = 4
+
+# Parallel download workers; all of them draw from the same request budget
+DEFAULT_WORKERS = 8
+
+# Progress and errors go through this logger. Records are only queued by the
+# calling thread; a listener thread does the actual writes to the terminal, so
+# download workers never wait on stdout.
+log = logging.getLogger("scraper")
 
-def fetch_index_works(session: requests.Session) -> list[dict]:
+
+class _TerminalHandler(logging.StreamHandler):
+    """StreamHandler that writes through tqdm when it is installed, so log lines print above the progress bar."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if tqdm is None:
+            super().emit(record)
+            return
+        try:
+            tqdm.write(self.format(record), file=self.stream)
+        except Exception:
+            self.handleError(record)
+
+
+def start_logging() -> logging.handlers.QueueListener:
+    """
+    Route the scraper log through a queue to stdout (errors to stderr), printing
+    bare messages. The caller stops the returned listener to flush the queue.
     """
-    Fetch the CCEL plain-text index page and return a list of work dicts.
+    out = _TerminalHandler(sys.stdout)
+    out.addFilter(lambda record: record.levelno < logging.WARNING)
+    err = _TerminalHandler(sys.stderr)
+    err.setLevel(logging.WARNING)
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    log.handlers[:] = [logging.handlers.QueueHandler(records)]
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    listener = logging.handlers.QueueListener(records, out, err, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Tokens refill continuously at *rate* per second up
+    to *capacity*; acquire() takes one, sleeping until one is available.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Every request to ccel.org goes through this one bucket
+_ccel_bucket = TokenBucket(REQUEST_RATE, REQUEST_BURST)
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: Path, data: dict) -> None:
+    """Write *data* to *path* through a temporary file, so readers never see half of it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _parse_index(html: str) -> list[dict]:
+    """
+    Return a work dict for each work page linked from the index HTML.
 
     Each entry in the index has an HTML page URL of the form:
         /ccel/{author_slug}/{work_slug}.html
     which maps to a .txt file at:
         https://ccel.org/ccel/{author_slug}/{work_slug}/{work_slug}.txt
     """
-    print(f"Fetching work list from {CCEL_INDEX_URL} …")
+    tree = lxml.html.fromstring(html)
+
+    # First anchor for each (author_slug, work_slug); the prefix test runs
+    # inside libxml2 and the regex settles the rest
+    anchors: dict[tuple[str, str], lxml.html.HtmlElement] = {}
+    for a in tree.xpath("//a[starts-with(@href, '/ccel/')]"):
+        m = _WORK_HREF_RE.fullmatch(a.get("href"))
+        if m:
+            anchors.setdefault(m.groups(), a)
+
+    return [
+        {
+            "author": author_slug,
+            "title": link_text(a) or f"{author_slug}/{work_slug}",
+            "filename": f"{author_slug}_{work_slug}.txt",
+            "txt_url": f"https://ccel.org/ccel/{author_slug[0]}/{author_slug}/{work_slug}/cache/{work_slug}.txt",
+            "page_url": f"https://ccel.org/ccel/{author_slug}/{work_slug}.html",
+        }
+        for (author_slug, work_slug), a in anchors.items()
+    ]
+
+
+def fetch_index_works(session: requests.Session, refresh: bool = False) -> list[dict]:
+    """
+    Return the list of work dicts from the CCEL plain-text index, from the
+    local cache when it is fresh or the page is unchanged. *refresh* ignores
+    the cache and fetches the page outright.
+    """
+    cached = None if refresh else _read_json(INDEX_CACHE_PATH)
+    if cached:
+        age = time.time() - INDEX_CACHE_PATH.stat().st_mtime
+        if age < INDEX_CACHE_TTL:
+            log.info(f"Using cached work list: {INDEX_CACHE_PATH}")
+            log.info(f"Found {len(cached['works'])} works in index.")
+            return cached["works"]
+
+    log.info(f"Fetching work list from {CCEL_INDEX_URL} …")
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
     try:
-        resp = session.get(CCEL_INDEX_URL, timeout=30)
+        _ccel_bucket.acquire()
+        resp = session.get(CCEL_INDEX_URL, timeout=30, headers=headers)
+        if resp.status_code == 304:
+            log.info("  Index unchanged; using cached work list")
+            INDEX_CACHE_PATH.touch()  # restart the TTL
+            works = cached["works"]
+            log.info(f"Found {len(works)} works in index.")
+            return works
         resp.raise_for_status()
     except requests.RequestException as e:
-        print(f"ERROR: Could not fetch index: {e}", file=sys.stderr)
+        log.error(f"ERROR: Could not fetch index: {e}")
         return []
 
-    soup = BeautifulSoup(resp.text, "lxml")
-    works = []
-    seen_urls: set[str] = set()
-
-    for a in soup.find_all("a", href=True):
-        href: str = a["href"]
-        # Match links like /ccel/author/work.html
-        if not href.startswith("/ccel/") or not href.endswith(".html"):
-            continue
-        # Strip leading slash and split: ['ccel', author_slug, 'work.html']
-        parts = href.lstrip("/").split("/")
-        if len(parts) != 3:
-            continue
-        _, author_slug, work_file = parts
-        work_slug = work_file[:-5]  # remove .html
-        txt_url = f"https://ccel.org/ccel/{author_slug[0]}/{author_slug}/{work_slug}/cache/{work_slug}.txt"
-        if txt_url in seen_urls:
-            continue
-        seen_urls.add(txt_url)
-        title = a.get_text(strip=True) or f"{author_slug}/{work_slug}"
-        works.append(
-            {
-                "author": author_slug,
-                "title": title,
-                "filename": f"{author_slug}_{work_slug}.txt",
-                "txt_url": txt_url,
-            }
-        )
-
-    print(f"Found {len(works)} works in index.")
+    works = _parse_index(resp.text)
+    _write_json(INDEX_CACHE_PATH, {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "works": works,
+    })
+    log.info(f"Found {len(works)} works in index.")
     return works
 
 
+class _TxtLinkFound(Exception):
+    def __init__(self, href: str) -> None:
+        self.href = href
+
+
+class _TxtLinkParser(html.parser.HTMLParser):
+    """Raises _TxtLinkFound at the first <a href> ending in .txt."""
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag != "a":
+            return
+        for name, value in attrs:
+            if name == "href" and value and value.endswith(".txt"):
+                raise _TxtLinkFound(value)
+
+
 def discover_txt_url(work_url: str, session: requests.Session) -> str | None:
     """
     Given a CCEL work page URL, try to find a link to the .txt download.
     Returns the URL string or None.
+
+    The page is parsed as it streams in, and the response is dropped at the
+    first .txt link, which on CCEL work pages sits near the top.
     """
+    parser = _TxtLinkParser()
     try:
-        resp = session.get(work_url, timeout=30)
-        resp.raise_for_status()
+        _ccel_bucket.acquire()
+        with session.get(work_url, timeout=30, stream=True) as resp:
+            resp.raise_for_status()
+            resp.encoding = resp.encoding or "utf-8"
+            for chunk in resp.iter_content(chunk_size=8192, decode_unicode=True):
+                parser.feed(chunk)
+            parser.close()
+    except _TxtLinkFound as found:
+        href = found.href
+        if href.startswith("http"):
+            return href
+        return f"https://ccel.org{href}"
     except requests.RequestException as e:
-        print(f"  Failed to fetch work page {work_url}: {e}", file=sys.stderr)
+        log.error(f"  Failed to fetch work page {work_url}: {e}")
+    return None
+
+
+def probe_work(work: dict, session: requests.Session, txt_links: dict[str, str]) -> dict | None:
+    """
+    HEAD-check a work's .txt URL before spending a download on it.
+
+    Returns the work, with "size" set when the server declares a length. If
+    the .txt is missing, the work page is searched for another .txt link and
+    the work is returned pointing there; None if there is none. Links found on
+    work pages are remembered in *txt_links*, keyed by page URL. Servers that
+    reject HEAD, and network errors, leave the work as is for the download to
+    deal with.
+    """
+    _ccel_bucket.acquire()
+    try:
+        resp = session.head(work["txt_url"], timeout=30, allow_redirects=True)
+    except requests.RequestException:
+        return work
+    if resp.status_code == 200:
+        length = resp.headers.get("Content-Length")
+        if length and length.isdigit():
+            return {**work, "size": int(length)}
+        return work
+    if resp.status_code in (405, 501) or resp.status_code < 400:
+        return work
+
+    page_url = work.get("page_url")
+    if not page_url:
         return None
+    txt_url = txt_links.get(page_url)
+    if txt_url is None:
+        txt_url = discover_txt_url(page_url, session)
+        if txt_url is None:
+            return None
+        txt_links[page_url] = txt_url
+    return {**work, "txt_url": txt_url}
 
-    soup = BeautifulSoup(resp.text, "lxml")
-    # Look for a link ending in .txt
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        if href.endswith(".txt"):
-            if href.startswith("http"):
-                return href
-            return f"https://ccel.org{href}"
-    return None
+
+def probe_works(works: list[dict], workers: int) -> list[dict]:
+    """
+    Run probe_work in parallel over *works* (all with a txt_url) and return
+    the works that survive, in their original order.
+    """
+    log.info(f"Checking .txt URLs for {len(works)} works …")
+    txt_links = _read_json(TXT_LINKS_PATH) or {}
+    known = len(txt_links)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        probed = list(pool.map(lambda w: probe_work(w, thread_session(HEADERS), txt_links), works))
+    if len(txt_links) != known:
+        _write_json(TXT_LINKS_PATH, txt_links)
+
+    kept = []
+    for work, result in zip(works, probed):
+        if result is None:
+            log.info(f"  [missing] {work['filename']} — no .txt on CCEL")
+        else:
+            kept.append(result)
+    return kept
 
 
-def download_work(work: dict, session: requests.Session) -> bool:
+def load_validators() -> dict[str, dict]:
+    return _read_json(VALIDATORS_PATH) or {}
+
+
+def save_validators(validators: dict[str, dict]) -> None:
+    _write_json(VALIDATORS_PATH, validators)
+
+
+def existing_files() -> frozenset[str]:
+    """Names of the files directly in manuscripts/, read with a single directory scan."""
+    try:
+        with os.scandir(MANUSCRIPTS_DIR) as entries:
+            return frozenset(e.name for e in entries if e.is_file())
+    except FileNotFoundError:
+        return frozenset()
+
+
+def _release_page_cache(fh) -> None:
     """
-    Download a single work to manuscripts/. Returns True on success.
-    Skips if the file already exists.
+    Tell the kernel the file behind *fh* won't be read again by this process,
+    so a bulk scrape doesn't push other processes' pages out of the cache.
+    DONTNEED only drops clean pages, so the data is synced first; that also
+    makes the .part contents durable before it is renamed into place.
     """
-    dest = MANUSCRIPTS_DIR / work["filename"]
-    if dest.exists():
-        print(f"  [skip] {work['filename']} already exists")
-        return True
+    fh.flush()
+    os.fdatasync(fh.fileno())
+    os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def download_work(
+    work: dict,
+    dest: Path,
+    session: requests.Session,
+    validators: dict[str, dict],
+    existing: frozenset[str],
+    progress: Callable[[int], object] | None = None,
+) -> bool:
+    """
+    Download a single work from its txt_url to *dest*. Returns True on success.
 
-    txt_url = work.get("txt_url")
-    if not txt_url:
-        print(f"  [skip] {work['filename']} — no URL configured, expected in manuscripts/")
-        return True
+    *existing* is the set of file names already in manuscripts/ when the run
+    started (see existing_files). If *dest* is among them, it is requested
+    with the validators recorded in *validators*, and a 304 leaves it as is.
+    *validators* is updated with what the server sent for a new download.
 
-    print(f"  Downloading {work['author']} — {work['title']}")
-    print(f"    URL: {txt_url}")
+    The body goes to a sibling .part file and is renamed into place only once
+    complete. If the transfer breaks off, the .part file is kept (its
+    validators under its own name in *validators*) and the next run asks for
+    just the missing bytes with a Range request.
+
+    *progress*, if given, is called with the size of each chunk written.
+    """
+    filename = dest.name
+    txt_url = work["txt_url"]
+    exists = filename in existing
+
+    part = dest.with_name(dest.name + ".part")
+    resume_from = part.stat().st_size if part.name in existing else 0
+
+    headers = {}
+    if resume_from:
+        headers["Range"] = f"bytes={resume_from}-"
+        # Every other request advertises gzip/deflate (requests' default
+        # header) and the .part file holds the decoded body, so a byte range
+        # only lines up with it when the server sends the body unencoded.
+        headers["Accept-Encoding"] = "identity"
+        # Only resume if the file hasn't changed since the .part was started
+        partial = validators.get(part.name) or {}
+        if partial.get("etag") or partial.get("last_modified"):
+            headers["If-Range"] = partial.get("etag") or partial["last_modified"]
+    elif exists and filename in validators:
+        known = validators[filename]
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+    _ccel_bucket.acquire()
+    if not exists:
+        log.info(f"  Downloading {work['author']} — {work['title']}")
+        log.info(f"    URL: {txt_url}")
 
     try:
-        resp = session.get(txt_url, timeout=60, stream=True)
-        resp.raise_for_status()
+        with session.get(txt_url, timeout=60, stream=True, headers=headers) as resp:
+            if resp.status_code == 304:
+                log.info(f"  [unchanged] {filename}")
+                return True
+            if resp.status_code == 416:
+                # Nothing left past the end of the .part file: it should be complete
+                total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+                if total != str(resume_from):
+                    part.unlink(missing_ok=True)
+                    log.error(f"  ERROR: {part.name} does not match {txt_url}; discarded")
+                    return False
+                size = resume_from
+                served = validators.get(part.name) or {}
+            else:
+                resp.raise_for_status()
+                if exists:
+                    log.info(f"  Updating {work['author']} — {work['title']}")
+                served = {
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                }
+                validators[part.name] = served
+                if resp.status_code == 206:
+                    log.info(f"    Resuming {filename} from {resume_from // 1024} KB")
+                    mode = "ab"
+                    total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+                else:
+                    mode = "wb"
+                    total = resp.headers.get("Content-Length", "")
+                # A decoded body's length can't be checked against the encoded one
+                expected = None
+                if total.isdigit() and "Content-Encoding" not in resp.headers:
+                    expected = int(total)
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                with part.open(mode) as fh:
+                    if HAS_FADVISE:
+                        os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        fh.write(chunk)
+                        if progress:
+                            progress(len(chunk))
+                    size = fh.tell()
+                    if HAS_FADVISE:
+                        _release_page_cache(fh)
+                if expected is not None and size != expected:
+                    log.error(f"  ERROR: {filename} ended at {size} of {expected} bytes; "
+                              "will resume next run")
+                    return False
+        os.replace(part, dest)
+    except requests.HTTPError as e:
+        part.unlink(missing_ok=True)
+        validators.pop(part.name, None)
+        log.error(f"  ERROR: {e}")
+        return False
     except requests.RequestException as e:
-        print(f"  ERROR: {e}", file=sys.stderr)
+        log.error(f"  ERROR: {e}")
         return False
 
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    dest.write_bytes(resp.content)
-    size_kb = dest.stat().st_size // 1024
-    print(f"    Saved {dest.name} ({size_kb} KB)")
+    validators.pop(part.name, None)
+    validators[filename] = {**served, "size": size}
+    log.info(f"    Saved {dest.name} ({size // 1024} KB)")
     return True
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Download CCEL works as plain text")
     parser.add_argument("--list", action="store_true", help="List works without downloading")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, metavar="N",
+                        help=f"Parallel downloads (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Re-check already-downloaded works and fetch any that changed")
+    parser.add_argument("--probe", action="store_true",
+                        help="HEAD-check .txt URLs before downloading and drop works CCEL lacks")
+    parser.add_argument("--refresh-index", action="store_true",
+                        help="Fetch the CCEL index even if a cached work list is fresh")
     args = parser.parse_args()
 
-    session = requests.Session()
-    session.headers.update(HEADERS)
+    listener = start_logging()
+    try:
+        run(args)
+    finally:
+        listener.stop()
+
+
+def run(args: argparse.Namespace) -> None:
+    session = make_session(HEADERS)
 
-    works = fetch_index_works(session) + LOCAL_WORKS
+    works = fetch_index_works(session, refresh=args.refresh_index) + LOCAL_WORKS
 
     if args.list:
-        print(f"{'Author':<35} {'Title':<45} {'File'}")
-        print("-" * 100)
+        log.info(f"{'Author':<35} {'Title':<45} {'File'}")
+        log.info("-" * 100)
         for w in works:
             has_url = "[url]" if w.get("txt_url") else "(local)"
-            print(f"{w['author']:<35} {w['title']:<45} {w['filename']}  {has_url}")
+            log.info(f"{w['author']:<35} {w['title']:<45} {w['filename']}  {has_url}")
         return
 
-    already = sum(1 for w in works if (MANUSCRIPTS_DIR / w["filename"]).exists())
-    print(f"Downloading {len(works)} works to {MANUSCRIPTS_DIR}/ ({already} already present, will skip)")
-
-    ok = 0
-    fail = 0
-    for i, work in enumerate(works):
-        if i > 0:
-            time.sleep(REQUEST_DELAY)
-        success = download_work(work, session)
-        if success:
-            ok += 1
+    # One pass sorts the works into those that need no request and those to fetch
+    existing = existing_files()
+    already = 0
+    to_skip: list[tuple[dict, str]] = []
+    to_fetch: list[dict] = []
+    for work in works:
+        present = work["filename"] in existing
+        already += present
+        if present and not args.refresh:
+            to_skip.append((work, "already exists"))
+        elif not work.get("txt_url"):
+            to_skip.append((work, "— no URL configured, expected in manuscripts/"))
         else:
-            fail += 1
-
-    print(f"\nDone. {ok} succeeded, {fail} failed.")
+            to_fetch.append(work)
+
+    missing = 0
+    if args.probe:
+        probed = probe_works(to_fetch, args.workers)
+        missing = len(to_fetch) - len(probed)
+        to_fetch = probed
+
+    action = "will re-check" if args.refresh else "will skip"
+    log.info(f"Downloading {len(to_skip) + len(to_fetch)} works to {MANUSCRIPTS_DIR}/ "
+             f"({already} already present, {action})")
+    for work, reason in to_skip:
+        log.info(f"  [skip] {work['filename']} {reason}")
+
+    validators = load_validators()
+
+    # Byte progress across all downloads; the total is only known for works
+    # whose size --probe picked up, otherwise the bar just counts.
+    bar = None
+    if tqdm is not None and sys.stderr.isatty():
+        sizes = [w["size"] for w in to_fetch if "size" in w]
+        total = sum(sizes) if to_fetch and len(sizes) == len(to_fetch) else None
+        bar = tqdm(total=total, unit="B", unit_scale=True, unit_divisor=1024, desc="Downloading")
+
+    def fetch_one(work: dict) -> bool:
+        return download_work(work, MANUSCRIPTS_DIR / work["filename"], thread_session(HEADERS),
+                             validators, existing, progress=bar.update if bar is not None else None)
+
+    ok = len(to_skip)
+    fail = missing
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            for success in pool.map(fetch_one, to_fetch):
+                if success:
+                    ok += 1
+                else:
+                    fail += 1
+    finally:
+        if bar is not None:
+            bar.close()
+        save_validators(validators)
+
+    log.info(f"\nDone. {ok} succeeded, {fail} failed.")
 
 
 if __name__ == "__main__":